@@ -0,0 +1,422 @@
+"""Local stand-in for the Airtable records API, for load tests.
+
+    python bench/airtable_server.py --port 8765 --scale 1000 --latency 0.08 --jitter 0.04
+    python bench/airtable_server.py --rate-limit 5 --penalty 30 --error-rate 0.01
+
+Serves ``/v0/<base>/<table>`` (list, listRecords and create) from the
+synthetic records of bench.fake_airtable, seeded at ``--scale`` for every
+base id it is asked for. Every API request waits ``--latency`` plus up to
+``--jitter`` seconds. Like Airtable, a base that gets more than
+``--rate-limit`` requests in a second answers 429 to everything for
+``--penalty`` seconds (no Retry-After header unless ``--retry-after``).
+``--error-rate`` answers that share of requests with a 503.
+
+It also plays Airtable's webhooks: the base schema (``/v0/meta/bases/<base>/tables``),
+creating, listing, refreshing and deleting webhooks and listing their payloads.
+``POST /_edit`` with ``{"base", "table", "record", "fields"}`` edits a record
+as if someone did it in Airtable (no ``record``: create one, ``"delete": true``:
+delete it), records the change payload and pings every webhook of the base
+with its MAC. ``--drop-pings`` loses that share of the pings.
+
+Attachments are served from ``/attachments/`` as small PNGs. ``GET /_stats``
+returns the request counters as JSON and ``POST /_reset`` zeroes them.
+Point the app at it with ``AIRTABLE_ENDPOINT_URL = "http://127.0.0.1:8765"``
+in the secrets (bench/load_test.py does this for you).
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import urllib.request
+import zlib
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from bench.fake_airtable import PAGE_SIZE, FakeBase, FakeTable, seed  # noqa: E402
+
+FAKE_URL = "https://fake.airtable.local/"
+WEBHOOK_LIFETIME = timedelta(days=7)
+PAYLOADS_PAGE = 50
+
+
+def _fake_id(prefix, name):
+    """Stable Airtable-style id (tbl..., fld...) for a table or field name."""
+    return prefix + hashlib.sha1(name.encode("utf-8")).hexdigest()[:14]
+
+
+def _iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _png(color, size=64):
+    """A ``size`` x ``size`` PNG of one RGB color."""
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+    row = b"\x00" + bytes(color) * size
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * size)) + chunk(b"IEND", b""))
+
+
+class StandIn:
+    """Bases, rate limiting and counters shared by every request."""
+
+    def __init__(self, scale=100, latency=0.0, jitter=0.0, rate_limit=5, penalty=30, error_rate=0.0,
+                 retry_after=False, drop_pings=0.0):
+        self.scale = scale
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.penalty = penalty
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.drop_pings = drop_pings
+        self.url = ""  # public URL of the server, for the attachment links
+        self._lock = threading.Lock()
+        self._bases = {}
+        self._recent = {}         # base id -> times of its last requests
+        self._penalized = {}      # base id -> end of its 429 penalty
+        self.counts = Counter()   # "<base> <METHOD> <table>" -> requests
+        self.statuses = Counter()
+        self._webhooks = {}       # base id -> {webhook id: webhook}
+        self.pings = Counter()    # "sent", "dropped", "failed"
+
+    def base(self, base_id):
+        with self._lock:
+            base = self._bases.get(base_id)
+            if base is None:
+                base = self._bases[base_id] = FakeBase(seed(self.scale))
+            return base
+
+    def admit(self, base_id):
+        """None to serve the request, or the (status, retry after) to answer instead."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._penalized.get(base_id, 0):
+                return 429, self._penalized[base_id] - now
+            if self.rate_limit:
+                recent = self._recent.setdefault(base_id, deque())
+                while recent and now - recent[0] >= 1:
+                    recent.popleft()
+                if len(recent) >= self.rate_limit:
+                    self._penalized[base_id] = now + self.penalty
+                    return 429, self.penalty
+                recent.append(now)
+        if self.error_rate and random.random() < self.error_rate:
+            return 503, None
+        return None
+
+    def count(self, key, status):
+        with self._lock:
+            self.counts[key] += 1
+            self.statuses[str(status)] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": sum(self.counts.values()),
+                "by_endpoint": dict(self.counts),
+                "statuses": dict(self.statuses),
+                "pings": dict(self.pings),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.statuses.clear()
+            self.pings.clear()
+            self._recent.clear()
+            self._penalized.clear()
+
+
+    # ===== Schema and webhooks =====
+    def schema(self, base_id):
+        tables = []
+        for name, rows in self.base(base_id).tables.items():
+            names = list(dict.fromkeys(k for r in rows for k in r["fields"])) or ["Name"]
+            fields = [{"id": _fake_id("fld", f"{name}.{f}"), "name": f, "type": "singleLineText"} for f in names]
+            tables.append({"id": _fake_id("tbl", name), "name": name, "primaryFieldId": fields[0]["id"],
+                           "fields": fields, "views": []})
+        return {"tables": tables}
+
+    def webhooks(self, base_id):
+        with self._lock:
+            return self._webhooks.setdefault(base_id, {})
+
+    @staticmethod
+    def describe(hook):
+        return {
+            "id": hook["id"], "areNotificationsEnabled": hook["enabled"], "isHookEnabled": True,
+            "cursorForNextPayload": len(hook["payloads"]) + 1, "notificationUrl": hook["url"],
+            "lastSuccessfulNotificationTime": None, "lastNotificationResult": None,
+            "expirationTime": _iso(hook["expires"]), "specification": hook["spec"],
+        }
+
+    def add_webhook(self, base_id, body):
+        hook = {
+            "id": "ach" + os.urandom(7).hex(), "secret": os.urandom(32), "url": body["notificationUrl"],
+            "spec": body["specification"], "payloads": [], "enabled": True,
+            "expires": datetime.now(timezone.utc) + WEBHOOK_LIFETIME,
+        }
+        self.webhooks(base_id)[hook["id"]] = hook
+        return {"id": hook["id"], "macSecretBase64": base64.b64encode(hook["secret"]).decode("ascii"),
+                "expirationTime": _iso(hook["expires"])}
+
+    def edit(self, base_id, table, record_id=None, fields=None, delete=False):
+        """Change a record as Airtable's UI would and notify the webhooks; returns the record."""
+        base = self.base(base_id)
+        fields = fields or {}
+        field_ids = {f: _fake_id("fld", f"{table}.{f}") for f in fields}
+        if delete:
+            rec = base.remove(table, record_id)
+            change = {"destroyedRecordIds": [record_id]}
+        elif record_id:
+            rec = base.touch(table, record_id, **fields)
+            change = {"changedRecordsById": {record_id: {
+                "current": {"cellValuesByFieldId": {field_ids[f]: v for f, v in fields.items()}}}}}
+        else:
+            rec = base.add(table, **fields)
+            change = {"createdRecordsById": {rec["id"]: {
+                "createdTime": rec["createdTime"],
+                "cellValuesByFieldId": {field_ids[f]: v for f, v in fields.items()}}}}
+        if rec is None:
+            return None
+        for hook in list(self.webhooks(base_id).values()):
+            with self._lock:
+                hook["payloads"].append({
+                    "timestamp": _iso(datetime.now(timezone.utc)),
+                    "baseTransactionNumber": len(hook["payloads"]) + 1, "payloadFormat": "v0",
+                    "actionMetadata": {"source": "client", "sourceMetadata": {}},
+                    "changedTablesById": {_fake_id("tbl", table): change},
+                })
+            if hook["enabled"]:
+                threading.Thread(target=self._ping, args=(base_id, hook), daemon=True).start()
+        return {k: rec[k] for k in ("id", "createdTime", "fields")}
+
+    def _ping(self, base_id, hook):
+        if self.drop_pings and random.random() < self.drop_pings:
+            with self._lock:
+                self.pings["dropped"] += 1
+            return
+        body = json.dumps({"base": {"id": base_id}, "webhook": {"id": hook["id"]},
+                           "timestamp": _iso(datetime.now(timezone.utc))}).encode("utf-8")
+        mac = "hmac-sha256=" + hmac.new(hook["secret"], body, hashlib.sha256).hexdigest()
+        request = urllib.request.Request(hook["url"], data=body, method="POST", headers={
+            "Content-Type": "application/json", "X-Airtable-Content-MAC": mac})
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+            outcome = "sent"
+        except OSError:
+            outcome = "failed"
+        with self._lock:
+            self.pings[outcome] += 1
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as the app's pooled session expects
+    stand_in = None
+
+    def _send(self, status, payload=None, body=None, content_type="application/json", headers=()):
+        if payload is not None:
+            body = json.dumps(payload).replace(FAKE_URL, f"{self.stand_in.url}/attachments/").encode("utf-8")
+        body = body or b""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/_stats":
+            self._send(200, self.stand_in.stats())
+        elif url.path.startswith("/attachments/"):
+            att_id = url.path.rsplit("/", 1)[-1]
+            rng = random.Random(att_id)
+            self._send(200, body=_png([rng.randrange(256) for _ in range(3)]), content_type="image/png")
+        else:
+            self._api("GET", url.path, parse_qs(url.query))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path == "/_reset":
+            self.stand_in.reset()
+            self._send(200, {"reset": True})
+        elif url.path == "/_edit":
+            body = self._body()
+            rec = self.stand_in.edit(body["base"], body["table"], body.get("record"), body.get("fields"),
+                                     body.get("delete", False))
+            self._send(200 if rec else 404, {"record": rec})
+        else:
+            self._api("POST", url.path, parse_qs(url.query))
+
+    def do_DELETE(self):
+        url = urlsplit(self.path)
+        self._api("DELETE", url.path, parse_qs(url.query))
+
+    def _api(self, method, path, query):
+        parts = path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "v0":
+            self._send(404, {"error": "NOT_FOUND"})
+            return
+        if parts[1] == "meta" and len(parts) == 5:    # /v0/meta/bases/<base>/tables
+            base_id, table, action = parts[3], "meta", parts[4]
+        elif parts[1] == "bases" and len(parts) > 3:  # /v0/bases/<base>/webhooks[/<id>[/<action>]]
+            base_id, table, action = parts[2], "webhooks", "/".join(parts[4:])
+        else:
+            base_id, table = parts[1], parts[2]
+            action = parts[3] if len(parts) > 3 else ""
+        key = f"{base_id} {method} {table}{'/' + action if action else ''}"
+        if table == "webhooks":  # one counter per call, whatever the webhook id
+            key = f"{base_id} {method} webhooks{'/' + action.split('/', 1)[1] if '/' in action else ''}"
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self.stand_in.count(key, 401)
+            self._send(401, {"error": "AUTHENTICATION_REQUIRED"})
+            return
+        body = self._body() if method == "POST" else {}
+        delay = self.stand_in.latency + random.uniform(0, self.stand_in.jitter)
+        if delay:
+            time.sleep(delay)
+        refused = self.stand_in.admit(base_id)
+        if refused is not None:
+            status, wait = refused
+            self.stand_in.count(key, status)
+            headers = [("Retry-After", str(max(1, round(wait))))] if status == 429 and self.stand_in.retry_after else []
+            error = "RATE_LIMIT_REACHED" if status == 429 else "SERVICE_UNAVAILABLE"
+            self._send(status, {"errors": [{"error": error, "message": "Try again later"}]}, headers=headers)
+            return
+        if table == "meta":
+            self.stand_in.count(key, 200)
+            self._send(200, self.stand_in.schema(base_id))
+            return
+        if table == "webhooks":
+            status, payload = self._webhooks(method, base_id, action, query, body)
+            self.stand_in.count(key, status)
+            self._send(status, payload)
+            return
+        fake = FakeTable(self.stand_in.base(base_id), table)
+        try:
+            if method == "GET" or action == "listRecords":
+                payload = self._list(fake, query if method == "GET" else body)
+            elif not action:
+                payload = {"records": fake.batch_create([r.get("fields", {}) for r in body.get("records", [])])}
+            else:
+                self.stand_in.count(key, 404)
+                self._send(404, {"error": "NOT_FOUND"})
+                return
+        except requests.HTTPError as exc:
+            self.stand_in.count(key, exc.response.status_code)
+            self._send(exc.response.status_code, body=exc.response.content)
+            return
+        self.stand_in.count(key, 200)
+        self._send(200, payload)
+
+    def _webhooks(self, method, base_id, action, query, body):
+        """(status, payload) of a webhooks API call; ``action`` is what follows /webhooks/."""
+        stand_in = self.stand_in
+        hooks = stand_in.webhooks(base_id)
+        if not action:
+            if method == "POST":
+                return 200, stand_in.add_webhook(base_id, body)
+            return 200, {"webhooks": [stand_in.describe(h) for h in hooks.values()]}
+        hook_id, _, verb = action.partition("/")
+        hook = hooks.get(hook_id)
+        if hook is None:
+            return 404, {"error": "NOT_FOUND"}
+        if method == "DELETE" and not verb:
+            del hooks[hook_id]
+            return 200, {}
+        if verb == "refresh":
+            hook["expires"] = datetime.now(timezone.utc) + timedelta(days=7)
+            return 200, {"expirationTime": _iso(hook["expires"])}
+        if verb == "enableNotifications":
+            hook["enabled"] = bool(body.get("enable"))
+            return 200, {}
+        if verb == "payloads":
+            cursor = max(1, int((query.get("cursor") or ["1"])[0]))
+            page = hook["payloads"][cursor - 1:cursor - 1 + PAYLOADS_PAGE]
+            return 200, {"cursor": cursor + len(page), "payloads": page,
+                         "mightHaveMore": cursor - 1 + len(page) < len(hook["payloads"])}
+        return 404, {"error": "NOT_FOUND"}
+
+    @staticmethod
+    def _list(fake, options):
+        """One page of records for GET query params or a listRecords body."""
+        def one(name):
+            value = options.get(name)
+            return value[0] if isinstance(value, list) else value
+        if "sort" in options:  # listRecords body
+            sort = [("-" if s.get("direction") == "desc" else "") + s["field"] for s in options["sort"]]
+        else:
+            sort, i = [], 0
+            while f"sort[{i}][field]" in options:
+                desc = one(f"sort[{i}][direction]") == "desc"
+                sort.append(("-" if desc else "") + one(f"sort[{i}][field]"))
+                i += 1
+        fields = options.get("fields[]") or options.get("fields")
+        rows = fake.all(sort=sort, fields=fields, formula=one("filterByFormula"))
+        start = int(one("offset") or 0)
+        size = min(int(one("pageSize") or PAGE_SIZE), PAGE_SIZE)
+        page = {"records": rows[start:start + size]}
+        if start + size < len(rows):
+            page["offset"] = str(start + size)
+        return page
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(stand_in, host="127.0.0.1", port=8765):
+    """Start the server in a daemon thread; returns it (``server.server_address`` has the port)."""
+    server = ThreadingHTTPServer((host, port), type("BoundHandler", (Handler,), {"stand_in": stand_in}))
+    server.daemon_threads = True
+    stand_in.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True, name="airtable-stand-in").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scale", type=int, default=100, help="records per table")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds, at random")
+    parser.add_argument("--rate-limit", type=int, default=5, help="requests per second per base (0: no limit)")
+    parser.add_argument("--penalty", type=float, default=30, help="seconds a base answers 429 once over the limit")
+    parser.add_argument("--retry-after", action="store_true", help="send Retry-After with 429s (Airtable doesn't)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--drop-pings", type=float, default=0.0, help="share of webhook pings never delivered")
+    args = parser.parse_args()
+
+    stand_in = StandIn(args.scale, args.latency, args.jitter, args.rate_limit, args.penalty, args.error_rate,
+                       args.retry_after, args.drop_pings)
+    server = serve(stand_in, args.host, args.port)
+    print(f"Airtable stand-in on {stand_in.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
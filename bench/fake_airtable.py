@@ -0,0 +1,201 @@
+"""In-memory stand-in for the parts of pyairtable's ``Api``/``Table`` the app uses.
+
+Tables are seeded with synthetic portfolio data at a chosen scale, every
+page request can be delayed to simulate network latency, and every request
+is counted per table.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import requests
+
+PAGE_SIZE = 100  # Airtable returns at most 100 records per page
+
+CATEGORIES = ["Backend", "Frontend", "Data", "DevOps", "Cloud", "Mobile", "Security", "ML", "Design", "Management"]
+TECHS = ["Python", "Kubernetes", "React", "PostgreSQL", "AWS", "Docker", "Go", "Terraform", "Kafka", "TypeScript",
+         "Spark", "Airflow", "Rust", "GraphQL", "Redis", "Fintech", "Streamlit", "pandas", "Linux", "CI/CD"]
+WORDS = ("built scalable services for payments fintech platform data pipelines recruiting analytics "
+         "dashboards cloud migration observability customer onboarding machine learning search").split()
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _attachment(rng, kind):
+    att_id = f"att{kind}{rng.randrange(10**9):09d}"
+    return [{"id": att_id, "url": f"https://fake.airtable.local/{att_id}.png", "filename": f"{att_id}.png"}]
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def seed(scale, seed=0):
+    """Synthetic records for every table: one profile and ``scale`` of everything else."""
+    rng = random.Random(seed)
+    profile = [{
+        "Name": "Claudio E. Enobas Ese", "Description": _sentence(rng, 40), "tagline": "Software engineer",
+        "linkedin": "https://linkedin.example", "email": "me@example.com", "github": "https://github.example",
+        "picture": _attachment(rng, "pic"),
+    }]
+    experience = [{
+        "Role": rng.choice(["Engineer", "Senior Engineer", "Lead", "Architect", "Consultant"]),
+        "Company": f"Company {i}", "Location": rng.choice(["Madrid", "Remote", "London", "Berlin"]),
+        "startYear": 2000 + i % 25, "endYear": 2001 + i % 25 if i % 3 else None,
+        "Description": _sentence(rng, 30), "Technologies": rng.sample(TECHS, 4),
+        "link_company": f"https://company{i}.example", "image_company": _attachment(rng, "logo"),
+    } for i in range(scale)]
+    skills = [{
+        "Name": f"{rng.choice(TECHS)} {i}", "Notes": _sentence(rng, 12), "Level": rng.randint(1, 5),
+        "startYear": rng.choice([2008, 2012, 2016, 2020, ""]),
+        "Categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+    } for i in range(scale)]
+    projects = [{
+        "Name": f"Project {i}", "Description": _sentence(rng, 25), "skills": rng.sample(TECHS, 3),
+        "Knowledge": rng.sample(CATEGORIES, 2), "link": f"https://project{i}.example",
+        "image": _attachment(rng, "img"),
+    } for i in range(scale)]
+    return {"profile": profile, "experience": experience, "skills": skills, "projects": projects, "contacts": []}
+
+
+class FakeBase:
+    """Records of one base plus request counters shared by its tables."""
+
+    def __init__(self, tables, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.tables = {}
+        for name, rows in tables.items():
+            self.tables[name] = [
+                {"id": f"rec{name[:3]}{i:07d}", "createdTime": _now_iso(), "fields": dict(f), "_modified": _now_iso()}
+                for i, f in enumerate(rows)
+            ]
+
+    def request(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def touch(self, name, record_id, **fields):
+        """Edit a record as if done in Airtable (bumps its last-modified time)."""
+        for rec in self.tables[name]:
+            if rec["id"] == record_id:
+                rec["fields"].update(fields)
+                rec["_modified"] = _now_iso()
+                return rec
+
+    def add(self, name, **fields):
+        """Create a record as if done in Airtable."""
+        with self._lock:
+            self._created += 1
+            rec = {"id": f"rec{name[:3]}n{self._created:06d}", "createdTime": _now_iso(), "fields": dict(fields),
+                   "_modified": _now_iso()}
+            self.tables.setdefault(name, []).append(rec)
+        return rec
+
+    def schema(self):
+        """Tables and the fields their records use, shaped like pyairtable's BaseSchema."""
+        self.request("meta")
+        return SimpleNamespace(tables=[
+            SimpleNamespace(id=f"tbl{name}", name=name, fields=[
+                SimpleNamespace(id=f"fld{field}", name=field)
+                for field in dict.fromkeys(k for r in rows for k in r["fields"])
+            ])
+            for name, rows in self.tables.items()
+        ])
+
+    def remove(self, name, record_id):
+        """Delete a record as if done in Airtable; returns it (None if there was none)."""
+        rows = self.tables.get(name, [])
+        for i, rec in enumerate(rows):
+            if rec["id"] == record_id:
+                return rows.pop(i)
+
+
+class FakeTable:
+    def __init__(self, base, name):
+        self._base = base
+        self.name = name
+
+    @property
+    def base(self):
+        # Handles from FakeApi follow FakeApi.backend, as the app keeps table handles for the process
+        return self._base or FakeApi.backend
+
+    def _rows(self):
+        return self.base.tables.setdefault(self.name, [])
+
+    def _check_fields(self, fields):
+        # Like Airtable, reject projections naming a field the table doesn't have
+        known = {k for r in self._rows() for k in r["fields"]}
+        unknown = [f for f in fields or () if f not in known]
+        if unknown and known:
+            self.base.request(self.name)
+            response = requests.Response()
+            response.status_code = 422
+            response._content = json.dumps({"error": {
+                "type": "UNKNOWN_FIELD_NAME", "message": f'Unknown field name: "{unknown[0]}"'}}).encode()
+            raise requests.HTTPError(f"422 Client Error for table {self.name}", response=response)
+
+    def all(self, sort=None, fields=None, formula=None, **options):
+        self._check_fields(fields)
+        rows = self._rows()
+        if formula:
+            since = re.search(r"DATETIME_PARSE\('([^']+)'\)", formula)
+            if since:
+                rows = [r for r in rows if r["_modified"] > since.group(1)]
+            ids = set(re.findall(r"RECORD_ID\(\)\s*=\s*'(\w+)'", formula))
+            if ids:
+                rows = [r for r in rows if r["id"] in ids]
+        for key in reversed(sort or []):
+            field, desc = key.lstrip("-"), key.startswith("-")
+            rows = sorted(rows, key=lambda r: (r["fields"].get(field) is None, str(r["fields"].get(field, ""))),
+                          reverse=desc)
+        out = [{
+            "id": r["id"], "createdTime": r["createdTime"],
+            "fields": {k: v for k, v in r["fields"].items() if v is not None and (not fields or k in fields)},
+        } for r in rows]
+        for _ in range(max(1, -(-len(out) // PAGE_SIZE))):
+            self.base.request(self.name)
+        return out
+
+    def create(self, fields):
+        return self.batch_create([fields])[0]
+
+    def batch_create(self, records):
+        created = []
+        for i in range(0, len(records), 10):
+            self.base.request(self.name)
+            for fields in records[i:i + 10]:
+                rec = {"id": f"rec{self.name[:3]}{len(self._rows()):07d}", "createdTime": _now_iso(),
+                       "fields": dict(fields), "_modified": _now_iso()}
+                self._rows().append(rec)
+                created.append({k: rec[k] for k in ("id", "createdTime", "fields")})
+        return created
+
+
+class FakeApi:
+    """Drop-in for ``pyairtable.Api`` backed by a FakeBase (the base id is ignored)."""
+
+    backend = None  # the FakeBase every instance serves; set by the benchmark
+
+    def __init__(self, api_key, **kwargs):
+        self.api_key = api_key
+        self.session = requests.Session()  # never used for requests, but can be throttled
+
+    def table(self, base_id, name):
+        return FakeTable(None, name)
+
+    def base(self, base_id):
+        # The pyairtable Base handle, for its schema only
+        return SimpleNamespace(schema=lambda: FakeApi.backend.schema())
@@ -0,0 +1,525 @@
+"""Load test: many concurrent visitors on a running app backed by a local Airtable stand-in.
+
+    python bench/load_test.py                                     # 50 visitors for 60 s
+    python bench/load_test.py --sessions 300 --ramp 30 --duration 120 --latency 0.2 --jitter 0.1
+    python bench/load_test.py --secret LAZY_TABS=false --out bench/load-eager.json
+    python bench/load_test.py --tenants 5 --rate-limit 5 --compare bench/load-eager.json
+    python bench/load_test.py --app-url http://127.0.0.1:8501    # an app you started yourself
+
+By default it starts bench/airtable_server.py and ``streamlit run portfolio.py``
+on free ports, in a temporary folder with their own secrets, snapshot store
+and images. ``--secret KEY=VALUE`` adds app secrets, so configurations can
+be compared run against run.
+
+Every visitor opens its own websocket session and speaks Streamlit's
+protocol as the browser does: rerun requests carrying the widget states,
+fragment reruns for widgets inside fragments, and a message cache so
+unchanged elements come back as references. A visit lands on the page,
+switches tabs, filters and sorts the Skills, pages through the Projects,
+searches and sometimes submits the contact form, with think time between
+steps. Then the visitor leaves and a new one arrives.
+
+It reports p50/p95/p99 rerun latency per step, throughput, error rates,
+bytes and messages per rerun, the app's memory (RSS from /proc, Linux
+only) and the requests that reached the stand-in.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter, defaultdict
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.common import git_revision  # noqa: E402
+
+APP = os.path.join(ROOT, "portfolio.py")
+
+WIDGETS = {"selectbox", "multiselect", "text_input", "text_area", "button"}
+SEARCH_TERMS = ["python", "kube", "fintech", "data pipelines", "react", "cloud", "lead", "project 1"]
+CONTACT_SHARE = 0.2  # visits that end with a message
+SEARCH_SHARE = 0.5   # visits that search
+
+
+class Session:
+    """One visitor's websocket session, driven like the browser drives it."""
+
+    def __init__(self, app_url, query_string="", timeout=60):
+        self.url = app_url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.query_string = query_string
+        self.timeout = timeout
+        self.ws = None
+        self.page_hash = ""
+        self.widgets = {}   # widget id -> (kind, proto, fragment id)
+        self.states = {}    # widget id -> WidgetState sent with every rerun
+        self.messages = {}  # hash -> ForwardMsg: the browser's message cache
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None,
+                                           open_timeout=self.timeout)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def find(self, kind, label=None, key=None):
+        for wid, (k, proto, _) in self.widgets.items():
+            if k == kind and (label is None or proto.label == label) and (key is None or wid.endswith(f"-{key}")):
+                return wid
+        raise LookupError(f"no {kind} {label or key!r} on the page")
+
+    async def rerun(self, fragment_id="", trigger=None):
+        """Request a rerun; returns (seconds, bytes, messages, errors) once the script finished."""
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = self.query_string
+        state.page_script_hash = self.page_hash
+        state.fragment_id = fragment_id
+        state.widget_states.widgets.extend(self.states.values())
+        if trigger:
+            state.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        state.cached_message_hashes.extend(self.messages)
+        # Elements of what reruns now are replaced by what it sends
+        self.widgets = {k: v for k, v in self.widgets.items() if fragment_id and v[2] != fragment_id}
+
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        size = count = 0
+        errors = []
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), self.timeout)
+            size += len(raw)
+            count += 1
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "ref_hash":
+                cached = self.messages.get(fwd.ref_hash)
+                if cached is None:
+                    errors.append("unknown ref_hash")
+                    continue
+                ref, fwd = fwd, ForwardMsg()
+                fwd.CopyFrom(cached)
+                fwd.metadata.CopyFrom(ref.metadata)
+                kind = "delta"
+            if kind == "new_session":
+                self.page_hash = fwd.new_session.page_script_hash
+            elif kind == "delta":
+                if fwd.metadata.cacheable:
+                    self.messages[fwd.hash] = fwd
+                errors.extend(self._apply(fwd.delta))
+            elif kind == "session_event" and fwd.session_event.WhichOneof("type") == "script_compilation_exception":
+                errors.append("script compilation error")
+            elif kind == "script_finished":
+                break
+        if not fragment_id:
+            # The browser forgets the state of widgets that are gone
+            self.states = {k: v for k, v in self.states.items() if k in self.widgets}
+        return time.perf_counter() - started, size, count, errors
+
+    def _apply(self, delta):
+        kind = delta.WhichOneof("type")
+        if kind == "new_element":
+            element = delta.new_element.WhichOneof("type")
+            if element == "exception":
+                return [f"exception: {delta.new_element.exception.message[:80]}"]
+            if element in WIDGETS:
+                proto = getattr(delta.new_element, element)
+                self.widgets[proto.id] = (element, proto, delta.fragment_id)
+        elif kind == "add_block" and delta.add_block.WhichOneof("type") == "tab_container":
+            tabs = delta.add_block.tab_container
+            if tabs.id:  # tabs without a key switch in the browser only
+                self.widgets[tabs.id] = ("tabs", tabs, "")
+        return []
+
+    # ===== Interactions =====
+    async def _set(self, wid, **value):
+        self.states[wid] = WidgetState(id=wid, **value)
+        return await self.rerun(self.widgets[wid][2])
+
+    async def select(self, label, value):
+        return await self._set(self.find("selectbox", label), string_value=value)
+
+    async def multiselect(self, label, values):
+        wid = self.find("multiselect", label)
+        state = WidgetState(id=wid)
+        state.string_array_value.data.extend(values)
+        self.states[wid] = state
+        return await self.rerun(self.widgets[wid][2])
+
+    async def type(self, label, text, kind="text_input"):
+        return await self._set(self.find(kind, label), string_value=text)
+
+    async def click(self, label=None, key=None):
+        wid = self.find("button", label, key)
+        return await self.rerun(self.widgets[wid][2], trigger=wid)
+
+    async def open_tab(self, label):
+        """Switch tabs; None when the tabs don't track state (switching is client-side only)."""
+        try:
+            wid = self.find("tabs")
+        except LookupError:
+            return None
+        # The tabs rerun the whole page on change
+        self.states[wid] = WidgetState(id=wid, string_value=label)
+        return await self.rerun()
+
+
+async def visit(session, rng, stats, think, deadline):
+    """One visitor's journey through the page, recording every rerun in ``stats``."""
+    loop = asyncio.get_running_loop()
+
+    async def step(name, interaction):
+        if loop.time() >= deadline:
+            interaction.close()
+            raise TimeoutError("run over")
+        result = await interaction
+        if result is not None:
+            stats.record(name, *result)
+        await asyncio.sleep(rng.uniform(*think))
+
+    await session.connect()
+    await step("land", session.rerun())
+    if rng.random() < 0.5:
+        await step("experience_view", session.select("View", "Cards"))
+    await step("open_skills", session.open_tab("Skills"))
+    categories = list(session.widgets[session.find("multiselect", "Filter by categories")][1].options)
+    if categories:
+        await step("skills_filter", session.multiselect("Filter by categories", rng.sample(categories, min(2, len(categories)))))
+    sorts = list(session.widgets[session.find("selectbox", "Sort by")][1].options)
+    await step("skills_sort", session.select("Sort by", rng.choice(sorts)))
+    await step("open_projects", session.open_tab("Projects"))
+    try:
+        session.find("button", key="projects_page_next")
+    except LookupError:
+        pass  # a single page
+    else:
+        await step("projects_page", session.click(key="projects_page_next"))
+    if rng.random() < SEARCH_SHARE:
+        await step("search", session.type("Search", rng.choice(SEARCH_TERMS)))
+    if rng.random() < CONTACT_SHARE:
+        n = rng.randrange(10 ** 6)
+        await step("open_contact", session.open_tab("Contact"))
+        await step("contact_field", session.type("Your name", f"Load visitor {n}"))
+        await step("contact_field", session.type("Your email", f"visitor{n}@example.com"))
+        await step("contact_field", session.type("What can I do for you", "Load test message", "text_area"))
+        await step("contact_submit", session.click("Send"))
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # step -> seconds
+        self.bytes = 0
+        self.messages = 0
+        self.errors = Counter()
+        self.visits = 0
+        self.started = self.finished = time.perf_counter()
+
+    def record(self, name, seconds, size, count, errors):
+        self.latencies[name].append(seconds)
+        self.bytes += size
+        self.messages += count
+        for error in errors:
+            self.errors[error] += 1
+
+    def reruns(self):
+        return sum(len(v) for v in self.latencies.values())
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * q / 100
+    low, high = int(k), min(int(k) + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def _summary(values):
+    ms = [v * 1000 for v in values]
+    return {
+        "count": len(ms),
+        "p50": round(percentile(ms, 50), 1),
+        "p95": round(percentile(ms, 95), 1),
+        "p99": round(percentile(ms, 99), 1),
+        "max": round(max(ms), 1) if ms else 0.0,
+    }
+
+
+def rss_mb(pid):
+    """Resident memory of ``pid`` in MB (None where /proc is not available)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+async def sample_memory(pid, samples, interval=1.0):
+    while True:
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append(value)
+        await asyncio.sleep(interval)
+
+
+async def run_load(args, app_url, queries, app_pid=None):
+    stats = Stats()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + args.ramp + args.duration
+    memory = []
+    sampler = asyncio.create_task(sample_memory(app_pid, memory)) if app_pid else None
+
+    async def visitor(i):
+        await asyncio.sleep(args.ramp * i / max(1, args.sessions))
+        rng = random.Random(args.seed * 100003 + i)
+        while loop.time() < deadline:
+            session = Session(app_url, queries[i % len(queries)], args.timeout)
+            try:
+                await visit(session, rng, stats, (args.think_min, args.think_max), deadline)
+                stats.visits += 1
+            except TimeoutError as exc:
+                if str(exc) != "run over":
+                    stats.errors["rerun timeout"] += 1
+            except asyncio.TimeoutError:
+                stats.errors["rerun timeout"] += 1
+            except LookupError as exc:
+                stats.errors[f"missing widget: {exc}"] += 1
+            except (OSError, websockets.WebSocketException) as exc:
+                stats.errors[f"connection: {type(exc).__name__}"] += 1
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await session.close()
+                except Exception:
+                    pass
+
+    stats.started = time.perf_counter()
+    await asyncio.gather(*(visitor(i) for i in range(args.sessions)))
+    stats.finished = time.perf_counter()
+    if sampler is not None:
+        sampler.cancel()
+    return stats, memory
+
+
+# ===== Processes =====
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=90):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                return response.read()
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up in {timeout}s")
+            time.sleep(0.25)
+
+
+def get_json(url, method="GET"):
+    request = urllib.request.Request(url, method=method)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def toml_value(text):
+    """``true``, ``24`` or ``0.5`` as TOML values, anything else as a string."""
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        value = text
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return json.dumps(str(value))
+
+
+def write_secrets(path, stand_in_url, secrets, tenants):
+    lines = ['AIRTABLE_API_KEY = "load-test"', f'AIRTABLE_ENDPOINT_URL = "{stand_in_url}"']
+    lines += [f"{key} = {toml_value(value)}" for key, value in secrets]
+    for i in range(1, tenants + 1):
+        lines += ["", f"[tenants.t{i}]", f'base_id = "appLoadTenant{i:04d}"', 'api_key = "load-test"']
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def start_processes(args, workdir):
+    """Start the stand-in and the app; returns (processes, app URL, stand-in URL, app pid)."""
+    stand_in_port, app_port = free_port(), free_port()
+    stand_in_url = f"http://127.0.0.1:{stand_in_port}"
+    logs = open(os.path.join(workdir, "processes.log"), "w")
+    stand_in = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "bench", "airtable_server.py"), "--port", str(stand_in_port),
+        "--scale", str(args.scale), "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--rate-limit", str(args.rate_limit), "--penalty", str(args.penalty), "--error-rate", str(args.error_rate),
+    ], stdout=logs, stderr=subprocess.STDOUT)
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    shutil.copy(os.path.join(ROOT, "config.toml"), os.path.join(workdir, ".streamlit", "config.toml"))
+    write_secrets(os.path.join(workdir, ".streamlit", "secrets.toml"), stand_in_url, args.secret, args.tenants)
+    env = dict(os.environ, PORTFOLIO_STORE_DIR=os.path.join(workdir, "store"),
+               PORTFOLIO_IMAGE_DIR=os.path.join(workdir, "img"))
+    app = subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", APP, "--server.port", str(app_port),
+        "--server.address", "127.0.0.1", "--server.headless", "true", "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ], cwd=workdir, env=env, stdout=logs, stderr=subprocess.STDOUT)
+    app_url = f"http://127.0.0.1:{app_port}"
+    wait_for(f"{stand_in_url}/_stats")
+    wait_for(f"{app_url}/_stcore/health")
+    return [app, stand_in], app_url, stand_in_url, app.pid
+
+
+def report(stats, memory, upstream, args):
+    elapsed = stats.finished - stats.started
+    reruns = stats.reruns()
+    steps = {name: _summary(values) for name, values in stats.latencies.items()}
+    errors = sum(stats.errors.values())
+    return {
+        "steps": steps,
+        "all": _summary([v for values in stats.latencies.values() for v in values]),
+        "reruns": reruns,
+        "visits": stats.visits,
+        "throughput_rps": round(reruns / elapsed, 2) if elapsed else 0.0,
+        "errors": dict(stats.errors),
+        "error_rate": round(errors / (reruns + errors), 4) if reruns + errors else 0.0,
+        "kb_per_rerun": round(stats.bytes / 1024 / reruns, 1) if reruns else 0.0,
+        "messages_per_rerun": round(stats.messages / reruns, 1) if reruns else 0.0,
+        "rss_mb": {"start": round(memory[0], 1), "peak": round(max(memory), 1), "end": round(memory[-1], 1)}
+        if memory else None,
+        "upstream": upstream,
+        "seconds": round(elapsed, 1),
+    }
+
+
+def print_report(result):
+    print(f"\n{'step':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in list(result["steps"].items()) + [("all", result["all"])]:
+        print(f"{name:<18}{s['count']:>7}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}")
+    print(f"\n{result['reruns']} reruns in {result['visits']} visits over {result['seconds']}s: "
+          f"{result['throughput_rps']} reruns/s, {result['kb_per_rerun']} KB and "
+          f"{result['messages_per_rerun']} messages per rerun")
+    print(f"errors: {result['error_rate'] * 100:.2f}% {result['errors'] or ''}")
+    if result["rss_mb"]:
+        print("app memory (RSS MB): start {start}, peak {peak}, end {end}".format(**result["rss_mb"]))
+    if result["upstream"]:
+        print(f"Airtable stand-in: {result['upstream']['requests']} requests, statuses {result['upstream']['statuses']}")
+
+
+def compare(result, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        old = json.load(f)["result"]
+    print(f"\n{'':<18}{'now':>10}{'before':>10}{'change':>9}")
+    rows = [("p50 ms", result["all"]["p50"], old["all"]["p50"]),
+            ("p95 ms", result["all"]["p95"], old["all"]["p95"]),
+            ("p99 ms", result["all"]["p99"], old["all"]["p99"]),
+            ("reruns/s", result["throughput_rps"], old["throughput_rps"]),
+            ("error rate %", result["error_rate"] * 100, old["error_rate"] * 100),
+            ("KB per rerun", result["kb_per_rerun"], old["kb_per_rerun"])]
+    if result["upstream"] and old.get("upstream"):
+        rows.append(("upstream reqs", result["upstream"]["requests"], old["upstream"]["requests"]))
+    if result["rss_mb"] and old.get("rss_mb"):
+        rows.append(("peak RSS MB", result["rss_mb"]["peak"], old["rss_mb"]["peak"]))
+    for name, now, before in rows:
+        change = f"{(now - before) / before * 100:+.0f}%" if before else "n/a"
+        print(f"{name:<18}{now:>10.1f}{before:>10.1f}{change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent visitors")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds over which the visitors arrive")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of full load after the ramp")
+    parser.add_argument("--think-min", type=float, default=0.5, help="shortest pause between steps (s)")
+    parser.add_argument("--think-max", type=float, default=2.0, help="longest pause between steps (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds a rerun may take before it counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tenants", type=int, default=0, help="extra portfolios (?p=t1...) the visitors spread over")
+    parser.add_argument("--secret", type=lambda s: tuple(s.split("=", 1)), action="append", default=[],
+                        metavar="KEY=VALUE", help="app secret for this run (repeatable)")
+    stand_in = parser.add_argument_group("Airtable stand-in")
+    stand_in.add_argument("--scale", type=int, default=100, help="records per table")
+    stand_in.add_argument("--latency", type=float, default=0.1, help="seconds added to every request")
+    stand_in.add_argument("--jitter", type=float, default=0.05, help="up to this many more seconds, at random")
+    stand_in.add_argument("--rate-limit", type=int, default=5, help="requests per second per base (0: none)")
+    stand_in.add_argument("--penalty", type=float, default=30, help="seconds of 429s once over the rate limit")
+    stand_in.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--app-url", help="load an app that is already running instead of starting one")
+    parser.add_argument("--app-pid", type=int, help="pid of that app, for its memory")
+    parser.add_argument("--stand-in-url", help="stand-in of that app, for the upstream request counts")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary folder (logs, store)")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="portfolio-load-")
+    processes = []
+    try:
+        if args.app_url:
+            app_url, stand_in_url, app_pid = args.app_url, args.stand_in_url, args.app_pid
+        else:
+            processes, app_url, stand_in_url, app_pid = start_processes(args, workdir)
+        if stand_in_url:
+            get_json(f"{stand_in_url}/_reset", method="POST")
+        queries = [""] + [f"p=t{i}" for i in range(1, args.tenants + 1)]
+        print(f"{args.sessions} visitors on {app_url} for {args.ramp + args.duration:.0f}s", flush=True)
+        stats, memory = asyncio.run(run_load(args, app_url, queries, app_pid))
+        upstream = get_json(f"{stand_in_url}/_stats") if stand_in_url else None
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if args.keep:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = report(stats, memory, upstream, args)
+    print_report(result)
+    if args.out:
+        import streamlit
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "git_revision": git_revision(),
+                    "python": platform.python_version(),
+                    "streamlit": streamlit.__version__,
+                    "args": vars(args),
+                },
+                "result": result,
+            }, f, indent=2)
+        print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Offline benchmarks of portfolio.py reruns against a fake Airtable.
+
+    python bench/run_bench.py                                  # scales 10 and 1000
+    python bench/run_bench.py --scales 10 1000 10000 --latency 0.05 --out bench/results.json
+    python bench/run_bench.py --compare bench/baseline.json    # print the change vs an earlier run
+
+The app runs headlessly through Streamlit's AppTest with ``pyairtable.Api``
+replaced by bench.fake_airtable. For every scale and scenario it reports the
+wall time of each rerun, the time spent fetching (data.load_snapshot),
+normalizing (skills.skill_index) and rendering (render.*_html), the number
+of Airtable requests and the bytes of HTML the page emits.
+
+AppTest reruns the whole script on every interaction (fragments included),
+so widget scenarios measure a full rerun.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the benchmark's snapshot store and images away from the real ones
+_tmp = tempfile.mkdtemp(prefix="portfolio-bench-")
+os.environ.setdefault("PORTFOLIO_STORE_DIR", os.path.join(_tmp, "store"))
+os.environ.setdefault("PORTFOLIO_IMAGE_DIR", os.path.join(_tmp, "img"))
+
+import data  # noqa: E402
+import images  # noqa: E402
+import render  # noqa: E402
+import search  # noqa: E402
+import skills  # noqa: E402
+from bench.common import git_revision  # noqa: E402
+from bench.fake_airtable import FakeApi, FakeBase, seed  # noqa: E402
+
+APP = os.path.join(ROOT, "portfolio.py")
+SECRETS = {"AIRTABLE_API_KEY": "bench"}
+
+# Phase -> (module, function names) timed by wrapping them
+PHASES = {
+    "fetch": (data, ["load_snapshot"]),
+    "normalize": (skills, ["skill_index"]),
+    "render": (render, ["experience_html", "skills_html", "projects_html"]),
+}
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.totals = defaultdict(float)
+
+    def install(self):
+        for phase, (module, names) in PHASES.items():
+            for name in names:
+                setattr(module, name, self._wrap(phase, getattr(module, name)))
+
+    def _wrap(self, phase, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[phase] += time.perf_counter() - start
+        return timed
+
+    def take(self):
+        totals, self.totals = dict(self.totals), defaultdict(float)
+        return {phase: round(totals.get(phase, 0.0) * 1000, 3) for phase in PHASES}
+
+
+def new_app(timeout):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+    return at
+
+
+def html_bytes(at):
+    total = sum(len(el.proto.body.encode("utf-8")) for el in at.get("html"))
+    total += sum(len(el.value.encode("utf-8")) for el in at.markdown)
+    return total
+
+
+def widget(elements, label):
+    return next(el for el in elements if el.label == label)
+
+
+def reset_caches():
+    data.reset()
+    render.invalidate()
+    search.invalidate()
+    skills.invalidate()
+
+
+# ===== Scenarios =====
+# Each scenario prepares an app, then returns the interaction that is measured.
+def cold_load(at):
+    reset_caches()
+    return at.run
+
+
+def warm_load(at):
+    new_app(at.default_timeout).run()  # make sure every cache is warm
+    return at.run
+
+
+def experience_view(at):
+    at.run()
+    views = iter(["Cards", "Timeline"] * 1000)
+    return lambda: widget(at.selectbox, "View").set_value(next(views)).run()
+
+
+def skills_filter(at):
+    at.session_state["tab"] = "Skills"
+    at.run()
+    options = widget(at.multiselect, "Filter by categories").options
+    sorts = iter(skills.SORT_OPTIONS * 1000)
+
+    def interact():
+        widget(at.multiselect, "Filter by categories").set_value(options[:2])
+        widget(at.selectbox, "Sort by").set_value(next(sorts))
+        at.run()
+    return interact
+
+
+def projects_page(at):
+    at.session_state["tab"] = "Projects"
+    at.run()
+    pages = iter(["projects_page_next", "projects_page_prev"] * 1000)
+
+    def interact():
+        buttons = {b.key: b for b in at.button}
+        if "projects_page_next" not in buttons:
+            return at.run()  # a single page: nothing to turn
+        key = next(pages)
+        if buttons[key].proto.disabled:
+            key = "projects_page_prev" if key.endswith("next") else "projects_page_next"
+        buttons[key].click().run()
+    return interact
+
+
+def search_query(at):
+    at.run()
+    queries = iter(["kube", "fintech", "python data", "react"] * 1000)
+    return lambda: widget(at.text_input, "Search").input(next(queries)).run()
+
+
+def contact_submit(at):
+    at.session_state["tab"] = "Contact"
+    at.run()
+    counter = iter(range(10**6))
+
+    def interact():
+        n = next(counter)
+        widget(at.text_input, "Your name").input(f"Visitor {n}")
+        widget(at.text_input, "Your email").input(f"visitor{n}@example.com")
+        at.text_area[0].input("Let's talk about a project")
+        at.button[0].click().run()
+    return interact
+
+
+SCENARIOS = {
+    "cold_load": cold_load,
+    "warm_load": warm_load,
+    "experience_view": experience_view,
+    "skills_filter": skills_filter,
+    "projects_page": projects_page,
+    "search_query": search_query,
+    "contact_submit": contact_submit,
+}
+
+
+def run_scenario(name, scale, args, timer):
+    FakeApi.backend = FakeBase(seed(scale), latency=args.latency)
+    reset_caches()
+    reruns = []
+    for _ in range(args.repeat):
+        at = new_app(args.timeout)
+        interact = SCENARIOS[name](at)
+        FakeApi.backend.calls.clear()
+        timer.take()
+        start = time.perf_counter()
+        interact()
+        wall = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(f"{name} at scale {scale} raised: {at.exception[0].value}")
+        reruns.append({
+            "wall_ms": round(wall, 3),
+            "phases_ms": timer.take(),
+            "airtable_calls": sum(FakeApi.backend.calls.values()),
+            "html_bytes": html_bytes(at),
+        })
+    walls = [r["wall_ms"] for r in reruns]
+    return {
+        "scenario": name,
+        "scale": scale,
+        "latency_s": args.latency,
+        "reruns": reruns,
+        "wall_ms": {"mean": round(statistics.mean(walls), 3), "p50": round(statistics.median(walls), 3),
+                    "min": min(walls), "max": max(walls)},
+        "phases_ms": {p: round(statistics.mean(r["phases_ms"][p] for r in reruns), 3) for p in PHASES},
+        "airtable_calls": round(statistics.mean(r["airtable_calls"] for r in reruns), 2),
+        "html_bytes": reruns[-1]["html_bytes"],
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["scale"]): r for r in json.load(f)["results"]}
+    print(f"\n{'scenario':<18}{'scale':>7}{'wall p50 ms':>14}{'before':>10}{'change':>9}{'calls':>7}{'before':>8}")
+    for r in current:
+        old = baseline.get((r["scenario"], r["scale"]))
+        if old is None:
+            continue
+        before, after = old["wall_ms"]["p50"], r["wall_ms"]["p50"]
+        change = f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+        print(f"{r['scenario']:<18}{r['scale']:>7}{after:>14.1f}{before:>10.1f}{change:>9}"
+              f"{r['airtable_calls']:>7}{old['airtable_calls']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 1000], help="records per table")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake Airtable request")
+    parser.add_argument("--repeat", type=int, default=3, help="measured reruns per scenario")
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest timeout per rerun")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    # Run against the fake backend, without downloading attachments
+    data.Api = FakeApi
+    images.Image = None
+    timer = PhaseTimer()
+    timer.install()
+
+    results = []
+    print(f"{'scenario':<18}{'scale':>7}{'wall p50 ms':>14}{'fetch':>10}{'normalize':>11}{'render':>10}"
+          f"{'calls':>7}{'html KB':>10}")
+    for scale in args.scales:
+        for name in args.scenarios:
+            r = run_scenario(name, scale, args, timer)
+            results.append(r)
+            print(f"{name:<18}{scale:>7}{r['wall_ms']['p50']:>14.1f}{r['phases_ms']['fetch']:>10.1f}"
+                  f"{r['phases_ms']['normalize']:>11.1f}{r['phases_ms']['render']:>10.1f}"
+                  f"{r['airtable_calls']:>7}{r['html_bytes'] / 1024:>10.1f}")
+
+    if args.out:
+        import streamlit
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "git_revision": git_revision(),
+                    "python": platform.python_version(),
+                    "streamlit": streamlit.__version__,
+                    "args": vars(args),
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Webhook simulator: edits made "in Airtable" and how long the app takes to show them.
+
+    python bench/webhook_sim.py                                 # 30 edits with webhooks
+    python bench/webhook_sim.py --drop-pings 0.3 --reconcile 10 # lost pings, caught by reconciliation
+    python bench/webhook_sim.py --no-webhooks --ttl 30          # the same edits with TTL polling only
+    python bench/webhook_sim.py --out bench/webhooks.json
+
+Runs bench/airtable_server.py's stand-in and the app's data layer in this
+process, with the webhook receiver on a free port. Every edit (change,
+create or delete a record of experience, skills or projects, or touch a
+column the page doesn't read) goes through the stand-in, which pings the
+receiver. Readers poll data.get_records like visitors would, and the time
+until each edit is visible is recorded. Then the app idles with readers for
+``--idle`` seconds, to count the steady-state requests to Airtable.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="portfolio-webhooks-")
+os.environ.setdefault("PORTFOLIO_STORE_DIR", os.path.join(_tmp, "store"))
+os.environ.setdefault("PORTFOLIO_IMAGE_DIR", os.path.join(_tmp, "img"))
+
+import data  # noqa: E402
+import webhooks  # noqa: E402
+from bench.airtable_server import StandIn, serve  # noqa: E402
+from bench.load_test import free_port, percentile  # noqa: E402
+
+BASE_ID = "appWebhookSim0001"
+# Table -> (field edited, model attribute showing it)
+SHOWN = {"experience": ("Role", "role"), "skills": ("Name", "name"), "projects": ("Name", "name")}
+UNREAD_FIELD = "Internal notes"  # a column the page never reads
+POLL = 0.05  # seconds between reads while waiting for an edit
+
+
+def visible(table, kind, record_id, value):
+    records = {r.id: r for r in data.get_records(table)}
+    if kind == "delete":
+        return record_id not in records
+    record = records.get(record_id)
+    return record is not None and getattr(record, SHOWN[table][1]) == value
+
+
+def run_edits(stand_in, args, rng):
+    delays, missed, kinds = [], 0, {}
+    for i in range(args.edits):
+        table = rng.choice(list(SHOWN))
+        field, _ = SHOWN[table]
+        rows = stand_in.base(BASE_ID).tables[table]
+        roll = rng.random()
+        if roll < args.noise:
+            stand_in.edit(BASE_ID, table, rng.choice(rows)["id"], {UNREAD_FIELD: f"note {i}"})
+            kinds["unread column"] = kinds.get("unread column", 0) + 1
+            time.sleep(args.gap)
+            continue
+        value = f"Edited {i}"
+        if roll < args.noise + 0.15:
+            kind, record = "create", stand_in.edit(BASE_ID, table, None, {field: value, "Description": "New"})
+        elif roll < args.noise + 0.3:
+            kind, record = "delete", stand_in.edit(BASE_ID, table, rng.choice(rows)["id"], delete=True)
+        else:
+            kind, record = "change", stand_in.edit(BASE_ID, table, rng.choice(rows)["id"], {field: value})
+        kinds[kind] = kinds.get(kind, 0) + 1
+        started = time.monotonic()
+        while not visible(table, kind, record["id"], value):
+            if time.monotonic() - started > args.timeout:
+                missed += 1
+                break
+            time.sleep(POLL)
+        else:
+            delays.append(time.monotonic() - started)
+        time.sleep(args.gap)
+    return delays, missed, kinds
+
+
+def idle(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for table in SHOWN:
+            data.get_records(table)
+        time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edits", type=int, default=30)
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds between edits")
+    parser.add_argument("--noise", type=float, default=0.2, help="share of edits to a column the page doesn't read")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds an edit may take to show up")
+    parser.add_argument("--idle", type=float, default=60, help="seconds of steady state measured after the edits")
+    parser.add_argument("--scale", type=int, default=100, help="records per table")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stand-in adds to every request")
+    parser.add_argument("--drop-pings", type=float, default=0.0, help="share of pings the stand-in loses")
+    parser.add_argument("--reconcile", type=float, default=webhooks.RECONCILE_INTERVAL,
+                        help="seconds between payload polls without a ping")
+    parser.add_argument("--no-webhooks", action="store_true", help="rely on the cache TTL alone")
+    parser.add_argument("--ttl", type=float, default=data.CACHE_TTL, help="cache TTL without webhooks (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    stand_in = StandIn(args.scale, args.latency, drop_pings=args.drop_pings)
+    serve(stand_in, port=0)
+    for name in SHOWN:
+        first = stand_in.base(BASE_ID).tables[name][0]
+        first["fields"][UNREAD_FIELD] = ""  # so the column is in the schema from the start
+    data.configure("sim", BASE_ID, endpoint_url=stand_in.url)
+    data.load_snapshot(timeout=60)
+
+    if args.no_webhooks:
+        data.set_ttl(args.ttl)
+    else:
+        webhooks.RECONCILE_INTERVAL = args.reconcile
+        port = free_port()
+        subscription = webhooks.subscribe(f"http://127.0.0.1:{port}/airtable", port)
+        while not subscription.active:
+            if subscription.counts["errors"]:
+                sys.exit("the webhook could not be registered")
+            time.sleep(0.05)
+
+    stand_in.reset()
+    delays, missed, kinds = run_edits(stand_in, args, random.Random(args.seed))
+    edit_requests = stand_in.stats()
+    stand_in.reset()
+    idle(args.idle)
+    idle_requests = stand_in.stats()
+
+    result = {
+        "mode": "ttl" if args.no_webhooks else "webhooks",
+        "edits": kinds,
+        "visible_within_s": {
+            "p50": round(percentile(delays, 50), 2), "p95": round(percentile(delays, 95), 2),
+            "max": round(max(delays), 2) if delays else None,
+        },
+        "missed": missed,
+        "requests_during_edits": edit_requests["requests"],
+        "requests_per_min_idle": round(idle_requests["requests"] * 60 / args.idle, 2) if args.idle else None,
+        "pings": edit_requests["pings"],
+        "webhooks": webhooks.stats(),
+    }
+    print(f"{result['mode']}: {sum(kinds.values())} edits {kinds}")
+    print("visible after p50 {p50}s, p95 {p95}s, max {max}s".format(**result["visible_within_s"])
+          + f", {missed} not visible within {args.timeout:g}s")
+    print(f"Airtable requests: {result['requests_during_edits']} during the edits "
+          f"({edit_requests['by_endpoint']}), {result['requests_per_min_idle']}/min idle")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "result": result}, f, indent=2)
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
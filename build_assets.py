@@ -0,0 +1,319 @@
+"""Build the self-hosted CSS bundle and icon fonts served from static/.
+
+    python build_assets.py --fetch   # download the vendor CSS and fonts once (needs network)
+    python build_assets.py           # purge, minify and subset (works offline)
+
+The vendor stylesheets in assets/vendor/ are purged down to the rules whose
+classes appear in the app's HTML templates, concatenated with assets/app.css,
+minified into static/bundle.css, and every referenced font is subset to the
+glyphs the page uses (requires ``pip install fonttools brotli``; without it
+the fonts are copied as-is).
+"""
+import argparse
+import glob
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(ROOT, "assets")
+VENDOR_DIR = os.path.join(ASSETS_DIR, "vendor")
+STATIC_DIR = os.path.join(ROOT, "static")
+FONTS_DIR = os.path.join(STATIC_DIR, "fonts")
+BUNDLE = os.path.join(STATIC_DIR, "bundle.css")
+
+CDNJS = "https://cdnjs.cloudflare.com/ajax/libs"
+# Vendor stylesheets, in cascade order, and the files they are fetched from
+VENDOR_CSS = {
+    "materialize.css": f"{CDNJS}/materialize/1.0.0/css/materialize.css",
+    "fontawesome.css": f"{CDNJS}/font-awesome/6.6.0/css/all.css",
+}
+VENDOR_FONTS = {
+    "fa-brands-400.woff2": f"{CDNJS}/font-awesome/6.6.0/webfonts/fa-brands-400.woff2",
+    "fa-regular-400.woff2": f"{CDNJS}/font-awesome/6.6.0/webfonts/fa-regular-400.woff2",
+    "fa-solid-900.woff2": f"{CDNJS}/font-awesome/6.6.0/webfonts/fa-solid-900.woff2",
+    "MaterialIcons-Regular.ttf": "https://raw.githubusercontent.com/google/material-design-icons/master/font/MaterialIcons-Regular.ttf",
+}
+# Files scanned for the classes and icon names the page renders
+TEMPLATE_GLOBS = ["*.py"]
+# Classes added outside the templates (none today; keep e.g. JS-toggled states here)
+SAFELIST = set()
+
+
+# ===== Template scanning =====
+def template_sources():
+    paths = sorted({p for g in TEMPLATE_GLOBS for p in glob.glob(os.path.join(ROOT, g))})
+    return [open(p, encoding="utf-8").read() for p in paths if os.path.basename(p) != os.path.basename(__file__)]
+
+
+def used_classes(sources):
+    classes = set(SAFELIST)
+    for src in sources:
+        for attr in re.findall(r'class=(?:"([^"]*)"|\'([^\']*)\')', src):
+            for token in (attr[0] or attr[1]).split():
+                if "{" not in token and "}" not in token:
+                    classes.add(token)
+    return classes
+
+
+def used_icon_names(sources):
+    """Ligature names rendered inside <i class="material-icons ...">NAME</i>."""
+    names = set()
+    for src in sources:
+        names.update(re.findall(r'material-icons[^"\']*["\'][^>]*>([a-z0-9_]+)</i>', src))
+    return names
+
+
+# ===== CSS parsing and purging =====
+def strip_comments(css):
+    return re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+
+
+def parse_blocks(css):
+    """Split CSS into top-level (prelude, body) pairs; body is None for ``@x ...;`` statements."""
+    blocks, i, n = [], 0, len(css)
+    while i < n:
+        start, depth, quote = i, 0, None
+        while i < n:
+            ch = css[i]
+            if quote:
+                if ch == "\\":
+                    i += 1
+                elif ch == quote:
+                    quote = None
+            elif ch in "\"'":
+                quote = ch
+            elif ch == ";" and depth == 0:
+                blocks.append((css[start:i].strip(), None))
+                i += 1
+                break
+            elif ch == "{":
+                if depth == 0:
+                    prelude_end = i
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    blocks.append((css[start:prelude_end].strip(), css[prelude_end + 1:i]))
+                    i += 1
+                    break
+            i += 1
+        else:
+            break
+    return [(p, b) for p, b in blocks if p or b]
+
+
+def split_selectors(prelude):
+    parts, depth, current = [], 0, ""
+    for ch in prelude:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    parts.append(current.strip())
+    return [p for p in parts if p]
+
+
+def selector_used(selector, classes):
+    # Classes inside :not(...) only narrow a match, they are not required
+    required = re.sub(r":not\([^)]*\)", "", selector)
+    return all(c in classes for c in re.findall(r"\.(-?[_a-zA-Z][\w-]*)", required))
+
+
+def purge(blocks, classes):
+    kept = []
+    for prelude, body in blocks:
+        if body is None:
+            if not prelude.lower().startswith("@charset"):
+                kept.append((prelude, None))
+        elif prelude.startswith("@media") or prelude.startswith("@supports"):
+            inner = purge(parse_blocks(body), classes)
+            if inner:
+                kept.append((prelude, inner))
+        elif prelude.startswith("@"):
+            kept.append((prelude, body))  # @font-face / @keyframes are filtered by usage later
+        else:
+            selectors = [s for s in split_selectors(prelude) if selector_used(s, classes)]
+            if selectors:
+                kept.append((",".join(selectors), body))
+    return kept
+
+
+def _walk(blocks):
+    for prelude, body in blocks:
+        if isinstance(body, list):
+            yield from _walk(body)
+        else:
+            yield prelude, body
+
+
+def drop_unused_at_rules(blocks):
+    """Remove @font-face and @keyframes rules nothing else refers to."""
+    text = " ".join(body or "" for prelude, body in _walk(blocks) if not prelude.startswith("@"))
+
+    def keep(prelude, body):
+        if prelude.startswith("@font-face"):
+            family = re.search(r"font-family\s*:\s*([^;]+)", body)
+            return bool(family) and family.group(1).strip().strip("\"'") in text
+        if re.match(r"@(-\w+-)?keyframes", prelude):
+            return prelude.split()[-1] in text
+        return True
+
+    out = []
+    for prelude, body in blocks:
+        if isinstance(body, list):
+            inner = drop_unused_at_rules(body)
+            if inner:
+                out.append((prelude, inner))
+        elif body is None or keep(prelude, body):
+            out.append((prelude, body))
+    return out
+
+
+def serialize(blocks):
+    out = []
+    for prelude, body in blocks:
+        if body is None:
+            out.append(prelude + ";")
+        elif isinstance(body, list):
+            out.append(prelude + "{" + serialize(body) + "}")
+        else:
+            out.append(prelude + "{" + body + "}")
+    return "".join(out)
+
+
+def minify(css):
+    css = strip_comments(css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r"\s*:\s*(?=[^{}]*;|[^{}]*})", ":", css)  # only inside declarations
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+# ===== Fonts =====
+def font_urls(blocks):
+    """url(...) references of the kept @font-face rules."""
+    urls = []
+    for prelude, body in _walk(blocks):
+        if prelude.startswith("@font-face"):
+            urls.extend(re.findall(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)", body))
+    return urls
+
+
+def vendor_font(url):
+    """The vendor file for a font url (any format of the same font)."""
+    stem = os.path.splitext(os.path.basename(url.split("?")[0].split("#")[0]))[0]
+    for ext in (".woff2", ".ttf", ".woff", ".otf"):
+        path = os.path.join(VENDOR_DIR, stem + ext)
+        if os.path.exists(path):
+            return stem, path
+    return stem, None
+
+
+def codepoints(css):
+    """Unicode escapes used as icon content (``content:"\\f08c"`` / ``--fa:"\\f08c"``)."""
+    return {int(h, 16) for h in re.findall(r'["\']\\([0-9a-fA-F]{2,6})["\']', css)}
+
+
+def subset_font(src, dst, unicodes, text):
+    try:
+        from fontTools import subset
+    except ImportError:
+        print("fonttools not installed, copying", os.path.basename(src), "unsubset", file=sys.stderr)
+        shutil.copyfile(src, os.path.splitext(dst)[0] + os.path.splitext(src)[1])
+        return os.path.splitext(dst)[0] + os.path.splitext(src)[1]
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]  # keeps the Material Icons ligatures
+    options.name_IDs = ["*"]
+    font = subset.load_font(src, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes, text=text)
+    subsetter.subset(font)
+    subset.save_font(font, dst, options)
+    return dst
+
+
+def rewrite_font_faces(blocks, fonts):
+    """Point every @font-face at the single subset file built for it."""
+    out = []
+    for prelude, body in blocks:
+        if isinstance(body, list):
+            out.append((prelude, rewrite_font_faces(body, fonts)))
+            continue
+        if body is not None and prelude.startswith("@font-face"):
+            urls = re.findall(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)", body)
+            target = next((fonts[vendor_font(u)[0]] for u in urls if vendor_font(u)[0] in fonts), None)
+            if target is None:
+                continue
+            fmt = "woff2" if target.endswith(".woff2") else "truetype"
+            body = re.sub(r"src\s*:[^;]*(;|$)", "", body).strip().rstrip(";")
+            body += f";src:url(fonts/{os.path.basename(target)}) format('{fmt}')"
+        out.append((prelude, body))
+    return out
+
+
+# ===== Commands =====
+def fetch():
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for name, url in {**VENDOR_CSS, **VENDOR_FONTS}.items():
+        print("fetching", url)
+        request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(request, timeout=30) as response, \
+                open(os.path.join(VENDOR_DIR, name), "wb") as out:
+            out.write(response.read())
+
+
+def build():
+    missing = [n for n in VENDOR_CSS if not os.path.exists(os.path.join(VENDOR_DIR, n))]
+    if missing:
+        sys.exit(f"Missing vendor files {missing}: run `python build_assets.py --fetch` once")
+
+    sources = template_sources()
+    classes = used_classes(sources)
+    blocks = []
+    for name in VENDOR_CSS:
+        css = strip_comments(open(os.path.join(VENDOR_DIR, name), encoding="utf-8").read())
+        blocks.extend(purge(parse_blocks(css), classes))
+    # The app's own rules are always kept
+    blocks.extend(parse_blocks(strip_comments(open(os.path.join(ASSETS_DIR, "app.css"), encoding="utf-8").read())))
+    blocks = drop_unused_at_rules(blocks)
+
+    shutil.rmtree(FONTS_DIR, ignore_errors=True)
+    os.makedirs(FONTS_DIR, exist_ok=True)
+    unicodes = codepoints(serialize(blocks))
+    text = "".join(sorted(set("".join(used_icon_names(sources)))))
+    fonts = {}
+    for url in font_urls(blocks):
+        stem, path = vendor_font(url)
+        if stem in fonts:
+            continue
+        if path is None:
+            print("no vendor file for font", url, file=sys.stderr)
+            continue
+        fonts[stem] = subset_font(path, os.path.join(FONTS_DIR, stem + ".woff2"), unicodes, text)
+    blocks = rewrite_font_faces(blocks, fonts)
+
+    css = minify(serialize(blocks))
+    with open(BUNDLE, "w", encoding="utf-8") as out:
+        out.write(css)
+    print(f"{os.path.relpath(BUNDLE, ROOT)}: {len(css) / 1024:.1f} KB, {len(classes)} classes")
+    for path in fonts.values():
+        print(f"{os.path.relpath(path, ROOT)}: {os.path.getsize(path) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fetch", action="store_true", help="download the vendor files before building")
+    args = parser.parse_args()
+    if args.fetch:
+        fetch()
+    build()
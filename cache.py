@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Process-wide TTL cache with stale-while-revalidate refresh.
+# Streamlit keeps imported modules alive between reruns and sessions, so
+# instances created at module level are shared by every visitor.
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "size")
+
+    def __init__(self, value, stored_at, size=0):
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after ``ttl`` seconds.
+
+    Entries older than ``ttl`` but younger than ``ttl + stale_ttl`` are still
+    served while a background thread reloads them, so a visitor never waits
+    on a refresh once the cache is warm.
+
+    With ``sizeof`` (value -> estimated bytes) the cache also keeps count of
+    the memory it holds and, given ``maxbytes``, evicts the least recently
+    used entries to stay under it.
+    """
+
+    def __init__(self, ttl=300, stale_ttl=3600, maxsize=32, name="", maxbytes=None, sizeof=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.name = name
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._refreshing = set()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _store(self, key, value, stored_at=None):
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None:
+                self.bytes -= old.size
+            self._data[key] = _Entry(value, time.monotonic() if stored_at is None else stored_at, size)
+            self._data.move_to_end(key)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (
+                    self.maxbytes is not None and self.bytes > self.maxbytes and len(self._data) > 1):
+                old_key, old = self._data.popitem(last=False)
+                self.bytes -= old.size
+                self._key_locks.pop(old_key, None)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def _refresh(self, key, loader):
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+        else:
+            self._store(key, value)
+            with self._lock:
+                self.refreshes += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss."""
+        entry = self._lookup(key)
+        now = time.monotonic()
+        if entry is not None:
+            age = now - entry.stored_at
+            if age <= self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return entry.value
+            if age <= self.ttl + self.stale_ttl:
+                with self._lock:
+                    self.stale_hits += 1
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(
+                        target=self._refresh, args=(key, loader), daemon=True,
+                        name=f"cache-refresh-{self.name}",
+                    ).start()
+                return entry.value
+
+        # Cold or expired: load synchronously, one loader per key at a time
+        with self._key_lock(key):
+            entry = self._lookup(key)
+            if entry is not None and time.monotonic() - entry.stored_at <= self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return entry.value
+            with self._lock:
+                self.misses += 1
+            try:
+                value = loader()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            self._store(key, value)
+            return value
+
+    def ready(self, key):
+        """True if get(key) answers from the cache (fresh or stale) without loading."""
+        entry = self._lookup(key)
+        return entry is not None and time.monotonic() - entry.stored_at <= self.ttl + self.stale_ttl
+
+    def peek(self, key, default=None):
+        """Return the stored value regardless of age, without counting a hit."""
+        entry = self._lookup(key)
+        return entry.value if entry is not None else default
+
+    def set(self, key, value, stale=False):
+        """Store ``value``; a ``stale`` entry is served once and refreshed in the background."""
+        self._store(key, value, time.monotonic() - self.ttl - 0.001 if stale else None)
+
+    def invalidate(self, key=None):
+        """Drop ``key`` (or every entry when ``key`` is None)."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self.bytes = 0
+            else:
+                entry = self._data.pop(key, None)
+                if entry is not None:
+                    self.bytes -= entry.size
+
+    def discard(self, predicate):
+        """Drop every entry whose key matches ``predicate(key)``; returns how many."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for key in keys:
+                self.bytes -= self._data.pop(key).size
+                self._key_locks.pop(key, None)
+            return len(keys)
+
+    def nbytes(self):
+        """Estimated bytes held (0 without ``sizeof``)."""
+        return self.bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+            }
@@ -0,0 +1,174 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from pyairtable import Api
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ratelimit import TokenBucket
+
+# Process-wide Airtable client.
+# One pooled keep-alive session serves every session, thread and table, so
+# reruns reuse open TLS connections to api.airtable.com. Every attempt takes
+# a token from the shared rate limiter. A 429 pauses the limiter for the
+# base's penalty and is returned as is (callers serve their stale or stored
+# copy); transient 5xx answers to reads are retried with jittered backoff.
+
+AIRTABLE_URL = "https://api.airtable.com"
+CONNECT_TIMEOUT = 3.05  # seconds to open a connection
+READ_TIMEOUT = 10       # seconds to wait for a response
+POOL_SIZE = 8           # keep-alive connections kept open to Airtable
+MAX_ATTEMPTS = 4        # tries per request, including the first
+RATE_LIMIT_PENALTY = 30  # seconds Airtable refuses a base's requests after a 429
+TOKEN_WAIT = 5           # seconds a request inside max_wait() may wait for a token
+BACKOFF_BASE = 0.5       # seconds before the first retry of a 5xx
+BACKOFF_MAX = 8
+# 5xx answers retried for reads only: a write may have been applied
+RETRY_READ_STATUSES = (500, 502, 503, 504)
+
+logger = logging.getLogger(__name__)
+
+_max_wait = contextvars.ContextVar("airtable_max_wait", default=None)
+
+
+class RateLimited(requests.RequestException):
+    """No token within max_wait(): the base is paused after a 429, or the limiter is backed up."""
+
+
+@contextmanager
+def max_wait(seconds=TOKEN_WAIT):
+    """Requests made inside raise RateLimited rather than wait longer than ``seconds`` for a token.
+
+    For the page's read pool: a worker blocked behind a 30 s penalty would hold
+    up every table queued after it.
+    """
+    token = _max_wait.set(seconds)
+    try:
+        yield
+    finally:
+        _max_wait.reset(token)
+
+
+class PooledSession(requests.Session):
+    """requests Session with a sized connection pool, rate limiting and retries."""
+
+    def __init__(self, bucket, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_size=POOL_SIZE,
+                 max_attempts=MAX_ATTEMPTS):
+        super().__init__()
+        self.bucket = bucket
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        # urllib3 only retries failed connects (nothing was sent, so writes are safe too)
+        self.adapter = HTTPAdapter(
+            pool_connections=2, pool_maxsize=pool_size,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.2,
+                              respect_retry_after_header=False, raise_on_status=False),
+        )
+        self.mount("https://", self.adapter)
+        self.mount("http://", self.adapter)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "responses_429": 0, "rate_limited": 0, "retries_5xx": 0, "timeouts": 0, "errors": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.bucket.acquire(_max_wait.get()):
+                self._count("rate_limited")
+                raise RateLimited(f"no Airtable request token within {_max_wait.get()}s for {method} {url}")
+            self._count("requests")
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.Timeout:
+                self._count("timeouts")
+                raise
+            except requests.RequestException:
+                self._count("errors")
+                raise
+            delay = self._retry_delay(method, response, attempt)
+            if delay is None:
+                return response
+            logger.warning("Airtable answered %s to %s %s, retrying in %.1fs",
+                           response.status_code, method, url, delay)
+            response.close()
+            time.sleep(delay)
+        return response
+
+    def _retry_delay(self, method, response, attempt):
+        """Seconds to wait before retrying ``response``, or None to return it."""
+        if response.status_code == 429:
+            self._count("responses_429")
+            # The penalty applies to the whole base: the limiter holds back every request until it ends
+            self.bucket.pause((_retry_after(response) or RATE_LIMIT_PENALTY) * random.uniform(1.0, 1.2))
+            return None
+        if attempt >= self.max_attempts:
+            return None
+        if response.status_code in RETRY_READ_STATUSES and method.upper() == "GET":
+            self._count("retries_5xx")
+            # Exponential backoff with full jitter
+            return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        return None
+
+    def stats(self):
+        """Pool and retry counters for the operator panel and metrics."""
+        opened = sent = idle = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            sent += pool.num_requests
+            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "connections_opened": opened,
+            "connections_reused": max(0, sent - opened),
+            "connections_idle": idle,
+        }
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class AirtableClient:
+    """pyairtable Api on a PooledSession, with table handles created once."""
+
+    def __init__(self, api_key, bucket=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_size=POOL_SIZE,
+                 api_class=Api, endpoint_url=AIRTABLE_URL):
+        self.api_key = api_key
+        self.timeout = tuple(timeout)
+        self.endpoint_url = endpoint_url
+        self.bucket = bucket if bucket is not None else TokenBucket()
+        self.api = api_class(api_key, timeout=self.timeout, retry_strategy=None, endpoint_url=endpoint_url)
+        self.session = PooledSession(self.bucket, self.timeout, pool_size)
+        # Api put the token in its own session's headers
+        self.session.headers.update(self.api.session.headers)
+        self.api.session = self.session
+        self._tables = {}
+
+    def table(self, base_id, name):
+        handle = self._tables.get((base_id, name))
+        if handle is None:
+            handle = self._tables[(base_id, name)] = self.api.table(base_id, name)
+        return handle
+
+    def stats(self):
+        return self.session.stats()
+
+    def close(self):
+        self.session.close()
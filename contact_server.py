@@ -0,0 +1,112 @@
+"""Contact endpoint for the static export: the only dynamic part of the site.
+
+    python contact_server.py --port 8502 --allow-origin https://portfolio.example.com
+
+``POST /contact`` takes a JSON object with the Contact form fields and queues
+it in the same durable outbox the Streamlit app uses (data.submit_contact),
+so Airtable is written in the background and a double-click is answered
+with ``{"queued": false}``. Put it behind the same reverse proxy (and TLS)
+as the static files.
+
+Reads AIRTABLE_API_KEY from the environment or .streamlit/secrets.toml.
+"""
+import argparse
+import json
+import logging
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import data
+
+FIELDS = {"Name": 200, "email": 320, "phoneNumber": 40, "Notes": 5000}  # field -> max length
+MAX_BODY = 16 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def parse_contact(body):
+    """Contact record from a request body; raises ValueError when it is not acceptable."""
+    try:
+        payload = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("body must be JSON")
+    if not isinstance(payload, dict):
+        raise ValueError("body must be a JSON object")
+    fields = {}
+    for name, limit in FIELDS.items():
+        value = payload.get(name, "")
+        if not isinstance(value, str):
+            raise ValueError(f"{name} must be a string")
+        fields[name] = value.strip()[:limit]
+    if not fields["email"] and not fields["phoneNumber"]:
+        raise ValueError("an email or a phone number is required")
+    return fields
+
+
+class ContactHandler(BaseHTTPRequestHandler):
+    allow_origin = "*"
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", self.allow_origin)
+        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Vary", "Origin")
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self._send(204)
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/contact":
+            self._send(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self._send(413, {"error": "message too long"})
+            return
+        try:
+            fields = parse_contact(self.rfile.read(length))
+        except ValueError as exc:
+            self._send(400, {"error": str(exc)})
+            return
+        try:
+            queued = data.submit_contact(fields)
+        except Exception:
+            logger.exception("Could not queue a contact message")
+            self._send(503, {"error": "try again later"})
+            return
+        self._send(202, {"queued": queued})
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--allow-origin", default="*", help="origin of the static site (CORS)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    api_key = data.secret("AIRTABLE_API_KEY")
+    if not api_key:
+        sys.exit("AIRTABLE_API_KEY is not set (environment or .streamlit/secrets.toml)")
+    data.configure(api_key, data.AIRTABLE_BASE_ID)
+    ContactHandler.allow_origin = args.allow_origin
+    server = ThreadingHTTPServer((args.host, args.port), ContactHandler)
+    logger.info("Contact endpoint on http://%s:%d/contact", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
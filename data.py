@@ -0,0 +1,479 @@
+import logging
+import os
+import threading
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import requests
+from pyairtable import Api
+
+import metrics
+import models
+import tenants
+from cache import TTLCache
+from client import AIRTABLE_URL, AirtableClient, CONNECT_TIMEOUT, READ_TIMEOUT, max_wait
+from outbox import Outbox
+from ratelimit import bucket_for
+from store import SnapshotStore
+
+# Data access layer for the Airtable base behind the portfolio.
+# Every read goes through a process-wide TTL cache per table, so widget
+# interactions rerun the script without hitting the Airtable API.
+# Each tenant (tenants.py) has its own Base: client, caches, snapshot store
+# and outbox; the module functions work on the current tenant's.
+
+# Airtable base holding the owner's portfolio (the default tenant)
+AIRTABLE_BASE_ID = 'appjIL3JLyUSiFiyg'
+
+# Tables read by the page and the default query used for each one.
+# Only the fields the models read are downloaded.
+TABLES = {
+    "profile": {"fields": list(models.Profile.FIELDS)},
+    "experience": {"sort": ["-startYear"], "fields": list(models.Experience.FIELDS)},  # or '-startDate'
+    "skills": {"sort": ["-Level"], "fields": list(models.Skill.FIELDS)},
+    "projects": {"fields": list(models.Project.FIELDS)},
+}
+
+# A short field per table, used by the incremental sync to list record ids cheaply
+KEY_FIELDS = {
+    "profile": "Name",
+    "experience": "Role",
+    "skills": "Name",
+    "projects": "Name",
+}
+
+CACHE_TTL = 300          # seconds a table is considered fresh
+CACHE_STALE_TTL = 3600   # extra seconds a stale table is served while refreshing
+CACHE_MAXSIZE = 16       # distinct queries kept per table
+TABLE_TIMEOUT = 8        # seconds a cold load waits for any one table
+HTTP_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)  # default (connect, read) timeout of each Airtable request
+STORE_DIR = os.environ.get(
+    "PORTFOLIO_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+SECRETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+
+logger = logging.getLogger(__name__)
+
+
+def _table_cache(name, ttl=CACHE_TTL):
+    return TTLCache(ttl=ttl, stale_ttl=CACHE_STALE_TTL, maxsize=CACHE_MAXSIZE, name=name,
+                    sizeof=models.nbytes)
+
+
+def _query_key(options):
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in options.items()))
+
+
+def _records_formula(ids):
+    """Airtable formula matching the records with these ids."""
+    return "OR(" + ",".join(f"RECORD_ID()='{rid}'" for rid in sorted(ids)) + ")"
+
+
+def _fetch(name, loader):
+    # Cache misses and refreshes only: the time one table takes to come back from Airtable
+    started = time.perf_counter()
+    try:
+        return loader()
+    finally:
+        metrics.table_fetch(name, time.perf_counter() - started)
+
+
+@dataclass
+class Snapshot:
+    """Records of every table the page renders, loaded together."""
+
+    profile: list = field(default_factory=list)
+    experience: list = field(default_factory=list)
+    skills: list = field(default_factory=list)
+    projects: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)  # table name -> error message
+    loaded_at: float = 0.0
+
+    def ok(self, name):
+        return name not in self.errors
+
+
+class Base:
+    """Client, table caches, snapshot store and contact outbox of one Airtable base."""
+
+    def __init__(self):
+        self.client = None
+        self.base_id = None
+        self.bucket = None
+        self.store = None
+        self.outbox = None
+        # One worker per table so a cold load fetches them all at once
+        self.executor = ThreadPoolExecutor(max_workers=len(TABLES), thread_name_prefix="airtable")
+        # Table name -> field names, from the base schema (None until read, {} if it can't be)
+        self.fields = None
+        self._schema = None
+        self._schema_lock = threading.Lock()
+        self.ttl = CACHE_TTL
+        self.caches = {name: _table_cache(name) for name in TABLES}
+        self._unseeded = set()  # tables still to seed from the store on first use
+        self._lock = threading.Lock()
+        self._configure_lock = threading.Lock()
+
+    def configure(self, api_key, base_id, store_dir=STORE_DIR, timeout=HTTP_TIMEOUT, endpoint_url=None):
+        timeout = tuple(float(t) for t in timeout)
+        endpoint_url = endpoint_url or AIRTABLE_URL
+        # Sessions configure on their first rerun, often at the same moment: one at a
+        # time, so a base gets a single client, store and outbox worker
+        with self._configure_lock:
+            self._configure(api_key, base_id, store_dir, timeout, endpoint_url)
+
+    def _configure(self, api_key, base_id, store_dir, timeout, endpoint_url):
+        if (self.client is not None and self.client.api_key == api_key and self.client.timeout == timeout
+                and self.client.endpoint_url == endpoint_url and self.base_id == base_id):
+            return
+        if self.client is not None:
+            self.client.close()
+        # Every Airtable request of the base (reads, refreshes, contact writes) takes a token
+        self.bucket = bucket_for(base_id)
+        self.client = AirtableClient(api_key, self.bucket, timeout=timeout, api_class=Api,
+                                     endpoint_url=endpoint_url)
+        metrics.instrument_session(self.client.session)
+        if self.base_id != base_id:
+            self.invalidate()
+            if self.store is not None:
+                self.store.close()
+            if self.outbox is not None:
+                self.outbox.close()
+            self.store = SnapshotStore(os.path.join(store_dir, f"{base_id}.sqlite3")) if store_dir else None
+            self.outbox = Outbox(
+                os.path.join(store_dir or STORE_DIR, f"{base_id}-outbox.sqlite3"),
+                lambda records: self.table("contacts").batch_create(records),
+            )
+            self.outbox.start()
+            self.base_id = base_id
+            with self._lock:
+                self._unseeded = set(TABLES)
+            self.fields = None
+
+    def _seed_from_store(self):
+        # Loaded on first use, so a tenant costs no memory until it is visited
+        with self._lock:
+            names, self._unseeded = self._unseeded, set()
+        if self.store is None:
+            return
+        for name in names:
+            options = TABLES[name]
+            records = self.store.load(name)
+            if records is not None:
+                self.caches[name].set(_query_key(options), models.build(name, records), stale=True)
+
+    def table(self, name):
+        if self.client is None:
+            raise RuntimeError("data.configure() must be called before reading tables")
+        return self.client.table(self.base_id, name)
+
+    def get_records(self, name, **options):
+        self._seed_from_store()
+        options = options or TABLES.get(name, {})
+        cache = self.caches.get(name)
+        if cache is None:
+            cache = self.caches[name] = _table_cache(name, self.ttl)
+        if self.store is not None and options == TABLES.get(name) and name in KEY_FIELDS:
+            load = lambda: self._sync_table(name, options)
+        else:
+            load = lambda: self.table(name).all(**self._projected(name, options))
+        return cache.get(_query_key(options), lambda: models.build(name, _fetch(name, load)))
+
+    def schema(self, force=False):
+        """pyairtable schema of the base, read once; also sets the field names ``fields``."""
+        with self._schema_lock:
+            if self.fields is not None and not force:
+                return self._schema
+            try:
+                self._schema = self.airtable().schema()
+            except requests.HTTPError as exc:
+                if exc.response is None or exc.response.status_code not in (401, 403):
+                    raise
+                # A token without schema.bases:read: fetch every field rather than guess
+                logger.warning("Can't read the schema of %s (%s), fetching every field", self.base_id, exc)
+                self._schema, self.fields = None, {}
+                return None
+            self.fields = {t.name: {f.name for f in t.fields} for t in self._schema.tables}
+            return self._schema
+
+    def _projected(self, name, options):
+        """``options`` with ``fields`` narrowed to the ones the table has.
+
+        The models list every name a field may have ('startYear' or 'startDate', ...),
+        and Airtable answers a 422 for a projection naming a field it doesn't know.
+        """
+        if "fields" not in options:
+            return options
+        if self.fields is None:
+            self.schema()
+        known = self.fields.get(name)
+        if known is None:
+            return {k: v for k, v in options.items() if k != "fields"}
+        return {**options, "fields": [f for f in options["fields"] if f in known]}
+
+    def _sync_table(self, name, options):
+        try:
+            self.store.sync(name, self.table(name), self._projected(name, options), KEY_FIELDS[name])
+        except Exception:
+            records = self.store.load(name)
+            if records is None:
+                raise
+            logger.warning("Sync of %s failed, serving the stored snapshot", name, exc_info=True)
+            return records
+        return self.store.load(name)
+
+    def _load_table(self, name):
+        # A worker never waits out a 429 penalty: it fails and the stale or stored copy is served
+        with metrics.phase(f"fetch_{name}"), max_wait():
+            return self.get_records(name)
+
+    def load_snapshot(self, tables=None, timeout=TABLE_TIMEOUT):
+        self._seed_from_store()
+        snapshot = Snapshot(loaded_at=time.time())
+        futures = {}
+        for name in tables or TABLES:
+            if self.caches[name].ready(_query_key(TABLES[name])):
+                # Warm (a stale copy refreshes in the background): no need for a worker
+                with metrics.phase(f"fetch_{name}"):
+                    setattr(snapshot, name, self.get_records(name))
+                continue
+            # Each worker runs in a copy of this context so its timings count towards the rerun
+            futures[name] = self.executor.submit(metrics.context().run, self._load_table, name)
+        wait(futures.values(), timeout=timeout)
+
+        for name, future in futures.items():
+            if future.done() and future.exception() is None:
+                setattr(snapshot, name, future.result())
+                continue
+            if future.done():
+                snapshot.errors[name] = f"{type(future.exception()).__name__}: {future.exception()}"
+            else:
+                snapshot.errors[name] = f"timed out after {timeout}s"
+            stale = self.caches[name].peek(_query_key(TABLES[name]))
+            if stale is not None:
+                setattr(snapshot, name, stale)
+        return snapshot
+
+    def invalidate(self, name=None):
+        # An invalidated table isn't seeded from the store either: its next read syncs
+        with self._lock:
+            self._unseeded.difference_update(TABLES if name is None else {name})
+        for table_name, cache in self.caches.items():
+            if name is None or name == table_name:
+                cache.invalidate()
+
+    def set_ttl(self, ttl):
+        self.ttl = ttl
+        for cache in self.caches.values():
+            cache.ttl = ttl
+
+    def apply_changes(self, name, changed_ids=(), deleted_ids=(), reorder=False):
+        """Patch single records of ``name`` into the store and the cache.
+
+        Only ``changed_ids`` are downloaded (one request), plus the id sweep
+        when ``reorder`` (records added or a sort field edited). Returns the
+        models that were replaced or deleted, for render.forget().
+        """
+        if self.store is None or name not in KEY_FIELDS:
+            self.invalidate(name)
+            return []
+        options = TABLES[name]
+        deleted = set(deleted_ids)
+        records = []
+        if changed_ids:
+            projected = {k: v for k, v in self._projected(name, options).items() if k != "sort"}
+            records = _fetch(name, lambda: self.table(name).all(formula=_records_formula(changed_ids), **projected))
+            # Gone (or hidden) by the time we asked
+            deleted |= set(changed_ids) - {r["id"] for r in records}
+        order = None
+        if reorder:
+            order = [r["id"] for r in self.table(name).all(**{**options, "fields": [KEY_FIELDS[name]]})]
+        self.store.patch(name, records, deleted, order)
+
+        key = _query_key(options)
+        cache = self.caches[name]
+        old = cache.peek(key)
+        if old is None:
+            return []  # not in memory (evicted or never loaded): the store seeds it next time
+        touched = {r["id"] for r in records} | deleted
+        cache.invalidate()  # other queries of the table too
+        cache.set(key, models.build(name, self.store.load(name)))
+        return [m for m in old if m.id in touched]
+
+    def refresh(self, name, full=False):
+        """Serve ``name`` as stale, so the next read syncs it in the background.
+
+        ``full`` has that sync download the whole table (its fields changed;
+        read the schema again with schema(force=True) for the projection). The
+        stored copy stays until the new one is in, as the fallback if it fails.
+        """
+        if full and self.store is not None:
+            self.store.request_full_sync(name)
+        key = _query_key(TABLES[name])
+        current = self.caches[name].peek(key)
+        if current is not None:
+            self.caches[name].set(key, current, stale=True)
+
+    def get_state(self, key, default=None):
+        return self.store.get_state(key, default) if self.store is not None else default
+
+    def set_state(self, key, value):
+        if self.store is not None:
+            self.store.set_state(key, value)
+
+    def airtable(self):
+        """pyairtable Base handle (schema, webhooks)."""
+        if self.client is None:
+            raise RuntimeError("data.configure() must be called before reading tables")
+        return self.client.api.base(self.base_id)
+
+    def nbytes(self):
+        return sum(cache.nbytes() for cache in self.caches.values())
+
+    def evict(self):
+        """Drop the cached tables (they are seeded again from the store on the next
+        visit) and the idle connections; the client and the outbox keep running."""
+        self.invalidate()
+        with self._lock:
+            self._unseeded.update(TABLES)
+        if self.client is not None:
+            self.client.session.close()
+
+    def client_stats(self):
+        if self.client is None:
+            return {}
+        return {**self.client.stats(), **{f"rate_limit_{k}": v for k, v in self.bucket.stats().items()}}
+
+
+def _base():
+    """Base of the current tenant."""
+    return tenants.current().local("data", Base)
+
+
+def configure(api_key, base_id, store_dir=STORE_DIR, timeout=HTTP_TIMEOUT, endpoint_url=None):
+    """Create the current tenant's Airtable client once per process (no-op if unchanged).
+
+    The on-disk snapshot of ``base_id`` is opened at the same time and seeds
+    the caches on first use, so a fresh process serves the last good copy
+    instantly and syncs with Airtable in the background. ``endpoint_url``
+    replaces https://api.airtable.com (e.g. bench/airtable_server.py).
+    """
+    _base().configure(api_key, base_id, store_dir, timeout, endpoint_url)
+
+
+def secret(name, default=None, path=SECRETS_FILE):
+    """A Streamlit secret for scripts running outside Streamlit.
+
+    An environment variable of the same name wins over the secrets file.
+    """
+    if name in os.environ:
+        return os.environ[name]
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f).get(name, default)
+    except FileNotFoundError:
+        return default
+
+
+def table(name):
+    return _base().table(name)
+
+
+def get_records(name, **options):
+    """Return the records of table ``name``, served from the cache when possible.
+
+    Tables with a model (models.MODELS) come back as a tuple of models,
+    converted once per load rather than on every rerun. The models list
+    every field they can fall back to ('startYear' or 'startDate', ...),
+    but Airtable rejects unknown names in ``fields``, so the projection
+    keeps the ones the base schema lists (read once per base).
+    When a sync fails, the last good copy from the store is served instead.
+    """
+    return _base().get_records(name, **options)
+
+
+def submit_contact(fields):
+    """Queue a contact message for Airtable; False if it duplicates a recent one."""
+    outbox = _base().outbox
+    if outbox is None:
+        raise RuntimeError("data.configure() must be called before submitting contacts")
+    return outbox.submit(fields)
+
+
+def outbox_stats():
+    outbox = _base().outbox
+    return outbox.stats() if outbox is not None else {}
+
+
+def invalidate(name=None):
+    """Drop cached records for table ``name`` (or every table)."""
+    _base().invalidate(name)
+
+
+def reset():
+    """Drop every cached table and the on-disk snapshot: the next load is a cold fetch."""
+    base = _base()
+    base.invalidate()
+    if base.store is not None:
+        base.store.reset()
+
+
+def client_stats():
+    """Connection pool, retry and rate limiter counters of the Airtable client."""
+    return _base().client_stats()
+
+
+metrics.register_gauges("airtable", client_stats)
+metrics.register_gauges("outbox", outbox_stats)
+
+
+def set_ttl(ttl):
+    """Seconds the current tenant's tables stay fresh (longer while webhooks push changes)."""
+    _base().set_ttl(ttl)
+
+
+def apply_changes(name, changed_ids=(), deleted_ids=(), reorder=False):
+    """Fetch just the records of ``name`` that changed and patch them in; returns the replaced models."""
+    return _base().apply_changes(name, changed_ids, deleted_ids, reorder)
+
+
+def refresh(name, full=False):
+    """Have the next read of ``name`` sync it in the background (``full``: from scratch)."""
+    _base().refresh(name, full)
+
+
+def get_state(key, default=None):
+    """Value kept next to the current tenant's snapshot (e.g. its webhook and cursor)."""
+    return _base().get_state(key, default)
+
+
+def set_state(key, value):
+    _base().set_state(key, value)
+
+
+def airtable():
+    return _base().airtable()
+
+
+def schema(force=False):
+    """Schema of the current tenant's base, cached (None if the token can't read it)."""
+    return _base().schema(force)
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in _base().caches.items()}
+
+
+def load_snapshot(tables=None, timeout=TABLE_TIMEOUT):
+    """Fetch ``tables`` (default: every table) concurrently as one Snapshot.
+
+    Cached tables return immediately; cold ones are fetched in parallel, so
+    latency is bounded by the slowest table. A table that fails or exceeds
+    ``timeout`` is reported in ``errors`` and left empty (or served from its
+    last cached value) without holding back the others. A timed-out fetch
+    keeps running and fills the cache for the next rerun.
+    """
+    return _base().load_snapshot(tables, timeout)
@@ -0,0 +1,267 @@
+"""Export the portfolio as a static site: one HTML page, the CSS bundle and images.
+
+    python export.py --out site
+    python export.py --out site --contact-endpoint https://contact.example.com/contact
+
+The page is rendered from a fresh Airtable snapshot with the same templates
+as portfolio.py (render.py): the profile header, both Experience views, the
+Skills grid and the Projects grid. Tabs, the Experience view switch and the
+Skills filters/sort run client-side from a small inline script; the Skills
+sort orders and category sets are precomputed here (skills.SkillIndex), so the
+browser only shows, hides and reorders cards. Attachments are downloaded and
+resized into img/ because Airtable attachment URLs expire.
+
+The Contact form is the only dynamic part: it posts JSON to
+``--contact-endpoint`` (see contact_server.py). Without one, the Contact tab
+links to the email address of the profile instead.
+
+Reads AIRTABLE_API_KEY from the environment or .streamlit/secrets.toml.
+"""
+import argparse
+import html
+import json
+import os
+import shutil
+import sys
+import tomllib
+from datetime import datetime
+
+import data
+import frontend
+import images
+import render
+import skills
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILES = [os.path.join(ROOT, "config.toml"), os.path.join(ROOT, ".streamlit", "config.toml")]
+TITLE = "Claudio E. Enobas Ese - Portfolio"
+TABS = ["Experience", "Skills", "Projects", "Contact"]
+
+# Layout the Streamlit page provides around the cards (tabs, controls, page background)
+PAGE_CSS = """
+body{background:var(--page-bg);margin:0}
+main{max-width:1200px;margin:0 auto;padding:24px 16px 48px}
+.ex-tabs{display:flex;gap:4px;border-bottom:1px solid #ddd;margin:8px 0 16px;overflow-x:auto}
+.ex-tabs a{padding:10px 16px;color:#555;text-decoration:none;border-bottom:2px solid transparent;white-space:nowrap}
+.ex-tabs a[aria-selected=true]{color:var(--primary);border-bottom-color:var(--primary)}
+.ex-controls{display:flex;flex-wrap:wrap;gap:12px;align-items:center;margin:8px 0 12px}
+.ex-controls select{display:inline-block;width:auto;height:2.4rem;padding:0 8px;border:1px solid #ccc;border-radius:6px;background:#fff}
+.ex-cat{cursor:pointer;border:0}
+.ex-cat[aria-pressed=true]{background:var(--primary) !important;color:#fff}
+.ex-form{background:#fff;border:1px solid #ddd;border-radius:8px;padding:16px;max-width:720px}
+.ex-form label{display:block;margin:10px 0 4px;color:#555}
+.ex-form input,.ex-form textarea{width:100%;box-sizing:border-box;border:1px solid #ccc;border-radius:6px;padding:8px;font:inherit}
+.ex-form textarea{min-height:120px}
+.ex-form button{margin-top:12px;padding:8px 20px;border:0;border-radius:6px;background:var(--primary);color:#fff;cursor:pointer}
+.ex-info{background:#e8f0fe;border-radius:8px;padding:12px 16px;max-width:720px}
+"""
+
+# Tabs (#hash), Experience view switch, Skills filter/sort and the Contact form
+PAGE_JS = """
+(function(){
+var tabs=document.querySelectorAll('.ex-tabs a');
+function show(name){
+  var found=false;
+  tabs.forEach(function(a){var on=a.hash==='#'+name;found=found||on;a.setAttribute('aria-selected',on);
+    document.getElementById(a.hash.slice(1)).hidden=!on;});
+  if(!found&&tabs.length){show(tabs[0].hash.slice(1));}
+}
+window.addEventListener('hashchange',function(){show(location.hash.slice(1));});
+show(location.hash.slice(1));
+
+var view=document.getElementById('ex-view');
+view.addEventListener('change',function(){
+  document.querySelectorAll('[data-view]').forEach(function(el){el.hidden=el.dataset.view!==view.value;});
+});
+
+var grid=document.getElementById('ex-skills-grid');
+if(grid){
+  var idx=JSON.parse(document.getElementById('ex-skills-index').textContent);
+  var cards=Array.prototype.slice.call(grid.children);
+  var sort=document.getElementById('ex-sort'),picked={};
+  var apply=function(){
+    var cats=Object.keys(picked),keep=null;
+    if(cats.length){keep={};cats.forEach(function(c){idx.categories[c].forEach(function(i){keep[i]=1;});});}
+    cards.forEach(function(c){c.hidden=true;});
+    idx.orders[sort.value].forEach(function(i){if(!keep||keep[i]){cards[i].hidden=false;grid.appendChild(cards[i]);}});
+    document.getElementById('ex-no-skills').hidden=!cats.length||Object.keys(keep).length>0;
+  };
+  sort.addEventListener('change',apply);
+  document.querySelectorAll('.ex-cat').forEach(function(b){b.addEventListener('click',function(){
+    if(picked[b.dataset.cat]){delete picked[b.dataset.cat];}else{picked[b.dataset.cat]=1;}
+    b.setAttribute('aria-pressed',!!picked[b.dataset.cat]);apply();
+  });});
+}
+
+var form=document.getElementById('ex-contact');
+if(form){form.addEventListener('submit',function(e){
+  e.preventDefault();
+  var status=document.getElementById('ex-contact-status'),body={};
+  new FormData(form).forEach(function(v,k){body[k]=v;});
+  status.textContent='Sending...';
+  fetch(form.action,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(body)})
+    .then(function(r){if(!r.ok){throw new Error(r.status);}return r.json();})
+    .then(function(r){status.textContent=r.queued?'Message sent':'Message already sent';})
+    .catch(function(){status.textContent='The message could not be sent, please try again later.';});
+});}
+})();
+"""
+
+
+def theme_colors():
+    """(primary, background) from the Streamlit config, as the live app uses them."""
+    theme = {}
+    for path in CONFIG_FILES:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                theme.update(tomllib.load(f).get("theme", {}))
+    return theme.get("primaryColor") or "#1565C0", theme.get("backgroundColor") or "#ffffff"
+
+
+def attachments(snapshot):
+    found = [snapshot.profile[0].picture]
+    found += [e.logo for e in snapshot.experience]
+    found += [p.image for p in snapshot.projects]
+    return [a for a in found if a is not None]
+
+
+def copy_images(ids, out_dir):
+    img_dir = os.path.join(out_dir, "img")
+    os.makedirs(img_dir, exist_ok=True)
+    for att_id in sorted(ids):
+        for name in images.variant_files(att_id):
+            shutil.copy2(os.path.join(images.IMAGE_DIR, name), os.path.join(img_dir, name))
+
+
+def copy_bundle(out_dir):
+    if frontend.BUNDLE_VERSION is None:
+        return  # head_html falls back to the CDN stylesheets
+    shutil.copy2(frontend.BUNDLE, os.path.join(out_dir, "bundle.css"))
+    shutil.copytree(os.path.join(frontend.STATIC_DIR, "fonts"), os.path.join(out_dir, "fonts"), dirs_exist_ok=True)
+
+
+def skills_tab(records, year, theme):
+    index = skills.skill_index(records, year)
+    if not len(index):
+        return '<p>No skills found.</p>'
+    # Cards are emitted in the default order; every other order is a list of card positions
+    default = index.orders[skills.SORT_OPTIONS[0]]
+    position = {int(item): pos for pos, item in enumerate(default)}
+    payload = {
+        "orders": {sort: [position[int(i)] for i in order] for sort, order in index.orders.items()},
+        "categories": {c: sorted(position[int(i)] for i in index.masks[c].nonzero()[0]) for c in index.categories},
+    }
+    options = "".join(f'<option>{html.escape(s)}</option>' for s in skills.SORT_OPTIONS)
+    chips = "".join(
+        f'<button type="button" class="chip blue lighten-4 ex-cat" aria-pressed="false" data-cat="{html.escape(c)}">'
+        f'{html.escape(c)}</button>'
+        for c in index.categories
+    )
+    grid = render.skills_html(index.query((), skills.SORT_OPTIONS[0]), theme)
+    grid = grid.replace('<div class="row">', '<div class="row" id="ex-skills-grid">', 1)
+    # "</" can't appear inside the script element
+    index_json = json.dumps(payload, ensure_ascii=False).replace("</", "<\\/")
+    return (
+        f'<div class="ex-controls"><span>Filter by categories</span>{chips}</div>'
+        f'<div class="ex-controls"><label for="ex-sort">Sort by</label><select id="ex-sort">{options}</select></div>'
+        f'<p id="ex-no-skills" hidden>No skills in the selected categories.</p>'
+        f'{grid}<script type="application/json" id="ex-skills-index">{index_json}</script>'
+    )
+
+
+def contact_tab(profile, endpoint):
+    info = ("If you think I can help you with some of your projects or entrepreneurships, send me a message "
+            "I'll contact you as soon as I can. I'm always glad to help")
+    if not endpoint:
+        email = html.escape(profile.email)
+        return f'<p class="ex-info">{info}</p><p><a href="mailto:{email}">{email}</a></p>'
+    fields = [("Name", "Your name", "text"), ("email", "Your email", "email"),
+              ("phoneNumber", "WhatsApp phone number, with country code", "tel")]
+    inputs = "".join(
+        f'<label for="ex-{name}">{label}</label><input id="ex-{name}" name="{name}" type="{kind}">'
+        for name, label, kind in fields
+    )
+    return (
+        f'<p class="ex-info">{info}</p>'
+        f'<form id="ex-contact" class="ex-form" action="{html.escape(endpoint)}">{inputs}'
+        f'<label for="ex-Notes">What can I do for you</label><textarea id="ex-Notes" name="Notes"></textarea>'
+        f'<button type="submit">Send</button> <span id="ex-contact-status" role="status"></span></form>'
+    )
+
+
+def page_html(snapshot, year, primary_hex, background, contact_endpoint=None):
+    profile = snapshot.profile[0]
+    cv = profile.cv_url
+    experience = (
+        (render.cv_button_html(cv) if cv else '')
+        + '<div class="ex-controls"><label for="ex-view">View</label>'
+        '<select id="ex-view"><option>Timeline</option><option>Cards</option></select></div>'
+        + f'<div data-view="Timeline">{render.experience_html(snapshot.experience, "Timeline", primary_hex)}</div>'
+        + f'<div data-view="Cards" hidden>{render.experience_html(snapshot.experience, "Cards", primary_hex)}</div>'
+    )
+    sections = {
+        "Experience": experience,
+        "Skills": skills_tab(snapshot.skills, year, primary_hex),
+        "Projects": render.projects_html(snapshot.projects, primary_hex),
+        "Contact": contact_tab(profile, contact_endpoint),
+    }
+    nav = "".join(f'<a href="#{t.lower()}" role="tab">{t}</a>' for t in TABS)
+    body = "".join(f'<section id="{t.lower()}" role="tabpanel">{sections[t]}</section>' for t in TABS)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{TITLE}</title>
+<link rel="icon" href="data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>👨🏾‍💻</text></svg>">
+{frontend.head_html(primary_hex, bundle_url="bundle.css")}
+<style>:root{{--page-bg:{background}}}{PAGE_CSS}</style>
+</head>
+<body>
+<main>
+{render.profile_html(profile)}
+<nav class="ex-tabs" role="tablist">{nav}</nav>
+{body}
+</main>
+<script>{PAGE_JS}</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="site", help="output directory")
+    parser.add_argument("--contact-endpoint", help="URL the Contact form posts to (see contact_server.py)")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for Airtable and images")
+    args = parser.parse_args()
+
+    api_key = data.secret("AIRTABLE_API_KEY")
+    if not api_key:
+        sys.exit("AIRTABLE_API_KEY is not set (environment or .streamlit/secrets.toml)")
+    if images.Image is None:
+        sys.exit("Pillow is required to export the images (pip install pillow)")
+    data.configure(api_key, data.AIRTABLE_BASE_ID)
+    data.invalidate()  # export what Airtable has now, not the stored snapshot
+    snapshot = data.load_snapshot(timeout=args.timeout)
+    if snapshot.errors or not snapshot.profile:
+        sys.exit(f"Could not load the portfolio from Airtable: {snapshot.errors or 'no profile'}")
+
+    os.makedirs(args.out, exist_ok=True)
+    found = attachments(snapshot)
+    ready = images.fetch_all(found, timeout=args.timeout)
+    missing = {a.id for a in found} - ready
+    if missing:
+        print(f"warning: {len(missing)} image(s) could not be downloaded and link to Airtable (those URLs expire)")
+    copy_images(ready, args.out)
+    copy_bundle(args.out)
+    images.STATIC_URL = "img"
+    primary_hex, background = theme_colors()
+    page = page_html(snapshot, datetime.today().strftime("%Y"), primary_hex, background, args.contact_endpoint)
+    with open(os.path.join(args.out, "index.html"), "w", encoding="utf-8") as f:
+        f.write(page)
+    print(f"wrote {args.out}/index.html ({len(page.encode('utf-8')) / 1024:.0f} KB, {len(ready)} images)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import re
+
+# Page-level CSS: the self-hosted bundle built by build_assets.py, served by
+# Streamlit static serving, plus the theme colour as CSS variables.
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+BUNDLE = os.path.join(STATIC_DIR, "bundle.css")
+BUNDLE_URL = "app/static/bundle.css"
+
+# Used only when the bundle has not been built
+CDN_LINKS = (
+    '<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/materialize/1.0.0/css/materialize.min.css">'
+    '<link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">'
+    '<link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.6.0/css/all.min.css" rel="stylesheet">'
+)
+
+
+def hex_to_rgb(hex_color: str):
+    h = hex_color.lstrip("#")
+    if len(h) == 3:
+        h = "".join([c*2 for c in h])
+    try:
+        r = int(h[0:2], 16)
+        g = int(h[2:4], 16)
+        b = int(h[4:6], 16)
+        return r, g, b
+    except Exception:
+        return 21, 101, 192  # fallback to #1565C0
+
+
+def _bundle_version():
+    try:
+        with open(BUNDLE, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+    except OSError:
+        return None
+
+
+# Content hash of the bundle, computed once per process for cache busting
+BUNDLE_VERSION = _bundle_version()
+
+
+def head_html(primary_hex, bundle_url=BUNDLE_URL):
+    """Stylesheet link(s) and theme variables for the page."""
+    r, g, b = hex_to_rgb(primary_hex)
+    theme = f"<style>:root{{--primary:{primary_hex};--primary-rgb:{r},{g},{b};}}</style>"
+    if BUNDLE_VERSION is None:
+        with open(os.path.join(os.path.dirname(STATIC_DIR), "assets", "app.css"), encoding="utf-8") as f:
+            # The CDN stylesheets bring their own fonts
+            css = re.sub(r"@font-face\s*{[^}]*}", "", f.read())
+        return CDN_LINKS + theme + f"<style>{css}</style>"
+    return f'<link rel="stylesheet" href="{bundle_url}?v={BUNDLE_VERSION}">' + theme
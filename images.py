@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+
+import requests
+
+import tenants
+from templates import Markup, escape, safe_url
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # without Pillow the page keeps the Airtable URLs
+    Image = None
+
+# Local cache of Airtable attachments.
+# Each attachment is downloaded once (keyed by its attachment id), resized to
+# the sizes the page displays and written as WebP under static/, which
+# Streamlit serves from app/static/ (server.enableStaticServing). Until an
+# image is ready the original Airtable URL is used. Other tenants than the
+# default one get their own img/<slug>/ folder; every tenant has its own
+# download state and pool.
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+IMAGE_DIR = os.environ.get("PORTFOLIO_IMAGE_DIR", os.path.join(STATIC_DIR, "img"))
+STATIC_URL = "app/static/img"  # export.py points it at the exported site's img/ folder
+
+# Variant -> CSS box (width, height) it is displayed in; 1x and 2x files are written
+VARIANTS = {
+    "logo": (56, 56),     # experience timeline logo
+    "card": (600, 200),   # experience and project card images
+    "hero": (200, 200),   # profile picture
+}
+DENSITIES = (1, 2)
+WEBP_QUALITY = 80
+DOWNLOAD_TIMEOUT = 10
+RETRY_AFTER = 600  # seconds before a failed attachment is tried again
+DOWNLOAD_WORKERS = 4  # downloads at once per tenant, so one tenant's cold start can't hold up the others
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+
+
+class _State:
+    """Attachments of one tenant: downloading, failed and on disk."""
+
+    def __init__(self, folder):
+        self.folder = folder  # under IMAGE_DIR and STATIC_URL ('' for the default tenant)
+        self.pending = set()
+        self.failed = {}  # attachment id -> time of the last failure
+        self.ready = set()  # attachment ids with every variant on disk
+        # Bumped whenever an attachment lands on disk, so cached card HTML is rebuilt
+        self.version = 0
+        self.executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS,
+                                           thread_name_prefix=f"images-{folder or tenants.DEFAULT}")
+
+    def evict(self):
+        """Kept through tenant evictions: a few ids, and the pool that is still downloading."""
+
+    @property
+    def directory(self):
+        return os.path.join(IMAGE_DIR, self.folder) if self.folder else IMAGE_DIR
+
+    @property
+    def url(self):
+        return f"{STATIC_URL}/{self.folder}" if self.folder else STATIC_URL
+
+
+def _state():
+    tenant = tenants.current()
+    return tenant.local("images", lambda: _State("" if tenant.slug == tenants.DEFAULT else tenant.slug))
+
+
+def version():
+    """Changes whenever one of the current tenant's attachments lands on disk."""
+    return _state().version
+
+
+def _filename(att_id, variant, density):
+    return f"{att_id}-{variant}@{density}x.webp"
+
+
+def _has_variants(state, att_id):
+    return all(
+        os.path.exists(os.path.join(state.directory, _filename(att_id, v, d)))
+        for v in VARIANTS for d in DENSITIES
+    )
+
+
+def _resize(img, box):
+    # Scale so the image covers the box (object-fit does the cropping), never upscale
+    scale = min(1.0, max(box[0] / img.width, box[1] / img.height))
+    if scale >= 1.0:
+        return img
+    return img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+
+
+def _download(state, att_id, url):
+    try:
+        response = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        img = ImageOps.exif_transpose(Image.open(BytesIO(response.content)))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        os.makedirs(state.directory, exist_ok=True)
+        for variant, (w, h) in VARIANTS.items():
+            for density in DENSITIES:
+                path = os.path.join(state.directory, _filename(att_id, variant, density))
+                tmp = f"{path}.{os.getpid()}.tmp"
+                _resize(img, (w * density, h * density)).save(tmp, "WEBP", quality=WEBP_QUALITY)
+                os.replace(tmp, path)
+    except Exception as exc:
+        logger.warning("Could not cache attachment %s: %s", att_id, exc)
+        with _lock:
+            state.failed[att_id] = time.monotonic()
+    else:
+        with _lock:
+            state.ready.add(att_id)
+            state.failed.pop(att_id, None)
+            state.version += 1
+    finally:
+        with _lock:
+            state.pending.discard(att_id)
+
+
+def _cacheable(attachment):
+    return Image is not None and attachment.id.isalnum() and bool(attachment.url)
+
+
+def local_variants(attachment):
+    """Return True when the models.Attachment is cached on disk, scheduling its download otherwise."""
+    if not _cacheable(attachment):
+        return False
+    state = _state()
+    att_id = attachment.id
+    with _lock:
+        if att_id in state.ready:
+            return True
+        if att_id in state.pending:
+            return False
+        failed = state.failed.get(att_id)
+        if failed is not None and time.monotonic() - failed < RETRY_AFTER:
+            return False
+    if _has_variants(state, att_id):
+        with _lock:
+            state.ready.add(att_id)
+        return True
+    with _lock:
+        if att_id in state.pending:
+            return False
+        state.pending.add(att_id)
+    state.executor.submit(_download, state, att_id, attachment.url)
+    return False
+
+
+def fetch_all(attachments, timeout=None):
+    """Download every attachment not on disk yet and wait for them.
+
+    Returns the ids whose variants are available locally.
+    """
+    state = _state()
+    futures = []
+    for attachment in attachments:
+        if not _cacheable(attachment):
+            continue
+        att_id = attachment.id
+        if att_id in state.ready or _has_variants(state, att_id):
+            with _lock:
+                state.ready.add(att_id)
+            continue
+        with _lock:
+            if att_id in state.pending:
+                continue
+            state.pending.add(att_id)
+        futures.append(state.executor.submit(_download, state, att_id, attachment.url))
+    wait(futures, timeout=timeout)
+    with _lock:
+        return {a.id for a in attachments} & state.ready
+
+
+def variant_files(att_id):
+    """File names of every variant written for ``att_id``."""
+    return [_filename(att_id, v, d) for v in VARIANTS for d in DENSITIES]
+
+
+def img_attrs(attachment, variant, lazy=True):
+    """``src``/``srcset`` attributes for a models.Attachment.
+
+    Returns an empty string when there is no attachment.
+    """
+    if attachment is None:
+        return Markup("")
+    loading = ' loading="lazy" decoding="async"' if lazy else ''
+    if not local_variants(attachment):
+        return Markup(f'src="{escape(safe_url(attachment.url))}"{loading}')
+    att_id = attachment.id
+    url = _state().url
+    srcset = ", ".join(f"{url}/{_filename(att_id, variant, d)} {d}x" for d in DENSITIES)
+    return Markup(f'src="{escape(url)}/{escape(_filename(att_id, variant, 1))}" srcset="{escape(srcset)}"{loading}')
@@ -0,0 +1,384 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+# Hot-path instrumentation: phase timings, Airtable requests per table and
+# st.html payload sizes, aggregated per process.
+# Everything is off by default; while disabled, phase() hands back a shared
+# no-op context manager and the other hooks return after one flag check.
+# Aggregates are exported as Prometheus text (a file and/or a tiny HTTP
+# endpoint) and each rerun writes one structured log line.
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (1024, 10240, 102400, 512000, 1048576, 5242880, 10485760)
+TEXTFILE_INTERVAL = 10  # seconds between rewrites of the Prometheus text file
+
+logger = logging.getLogger(__name__)
+
+enabled = False
+_textfile = None
+_textfile_written = 0.0
+_server = None
+_lock = threading.Lock()
+_histograms = {}  # (metric, labels) -> _Histogram
+_counters = {}    # (metric, labels) -> float
+_collectors = {}  # prefix -> function returning {name: number}, exported as gauges
+# The rerun being measured in this thread (copied into worker threads by data.load_snapshot)
+_run = contextvars.ContextVar("portfolio_run", default=None)
+
+HELP = {
+    "portfolio_phase_seconds": "Time spent in each phase of the script",
+    "portfolio_run_seconds": "Wall time of a full rerun or a fragment rerun",
+    "portfolio_airtable_fetch_seconds": "Time to fetch or sync one table from Airtable (all pages)",
+    "portfolio_airtable_request_seconds": "Latency of single Airtable HTTP requests",
+    "portfolio_airtable_requests_total": "Airtable HTTP requests by table and status",
+    "portfolio_html_bytes": "Size of each st.html payload",
+}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+
+class _Run:
+    __slots__ = ("name", "started", "phases", "html_bytes", "airtable_requests")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.html_bytes = {}
+        self.airtable_requests = 0
+
+
+def configure(enable=True, textfile=None, port=None):
+    """Turn instrumentation on or off for the process (idempotent).
+
+    ``textfile`` is rewritten with the Prometheus text at most every
+    TEXTFILE_INTERVAL seconds (e.g. for node_exporter's textfile collector);
+    ``port`` serves the same text at http://127.0.0.1:<port>/metrics.
+    """
+    global enabled, _textfile, _server
+    enabled = bool(enable)
+    _textfile = textfile or None
+    if enabled and not logger.handlers:
+        # One JSON object per line, whatever the app's logging setup
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    if enabled and port and _server is None:
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+        except OSError as exc:
+            logger.warning("Metrics endpoint not started on port %s: %s", port, exc)
+        else:
+            threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-http").start()
+
+
+# ===== Recording =====
+def _observe(metric, labels, value, buckets=SECONDS_BUCKETS):
+    key = (metric, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = _Histogram(buckets)
+        hist.observe(value)
+
+
+def _count(metric, labels, value=1):
+    key = (metric, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _Phase:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        _observe("portfolio_phase_seconds", (("phase", self.name),), elapsed)
+        run = _run.get()
+        if run is not None:
+            run.phases[self.name] = run.phases.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name):
+    """Context manager timing the ``name`` phase (a no-op while disabled)."""
+    return _Phase(name) if enabled else _NO_PHASE
+
+
+def timed(name):
+    """Decorator timing every call of the function as phase ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def payload(section, body):
+    """Record the size of an st.html ``body``; returns it unchanged."""
+    if enabled:
+        size = len(body.encode("utf-8"))
+        _observe("portfolio_html_bytes", (("section", section),), size, BYTES_BUCKETS)
+        run = _run.get()
+        if run is not None:
+            run.html_bytes[section] = run.html_bytes.get(section, 0) + size
+    return body
+
+
+def table_fetch(name, seconds):
+    """Record a complete fetch (or sync) of Airtable table ``name``."""
+    if enabled:
+        _observe("portfolio_airtable_fetch_seconds", (("table", name),), seconds)
+
+
+def _table_from_url(url):
+    # https://api.airtable.com/v0/<base>/<table>[/<record>]
+    parts = urlsplit(str(url)).path.split("/")
+    return unquote(parts[3]) if len(parts) > 3 and parts[1] == "v0" else "other"
+
+
+def instrument_session(session):
+    """Count and time every request sent through the requests ``session`` per table.
+
+    Wraps ``send``, so each attempt (retries included) is one sample and
+    time spent waiting for a rate limiter token is not.
+    """
+    send = session.send
+
+    @functools.wraps(send)
+    def instrumented(request, **kwargs):
+        if not enabled:
+            return send(request, **kwargs)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = send(request, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            labels = (("table", _table_from_url(request.url)),)
+            _observe("portfolio_airtable_request_seconds", labels, time.perf_counter() - started)
+            _count("portfolio_airtable_requests_total", labels + (("status", status),))
+            run = _run.get()
+            if run is not None:
+                run.airtable_requests += 1
+
+    session.send = instrumented
+    return session
+
+
+def register_gauges(prefix, collect):
+    """Export the numbers of ``collect()`` as ``portfolio_<prefix>_<name>`` gauges."""
+    _collectors[prefix] = collect
+
+
+# ===== Runs =====
+def start_run(name):
+    """Begin measuring a rerun in this thread; returns a token for finish_run()."""
+    if not enabled:
+        return None
+    return _run.set(_Run(name))
+
+
+def finish_run(token):
+    """Close the run from start_run(): record its wall time and log it."""
+    if token is None:
+        return
+    run = _run.get()
+    _run.reset(token)
+    if run is None:
+        return
+    elapsed = time.perf_counter() - run.started
+    _observe("portfolio_run_seconds", (("run", run.name),), elapsed)
+    logger.info(json.dumps({
+        "event": "rerun",
+        "run": run.name,
+        "ms": round(elapsed * 1000, 2),
+        "phases_ms": {k: round(v * 1000, 2) for k, v in run.phases.items()},
+        "html_bytes": run.html_bytes,
+        "airtable_requests": run.airtable_requests,
+    }, sort_keys=True))
+    _maybe_write_textfile()
+
+
+def section(name):
+    """Decorator for a fragment: a phase of the page run, or its own run on a fragment rerun."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            if _run.get() is not None:
+                with _Phase(name):
+                    return func(*args, **kwargs)
+            token = start_run(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish_run(token)
+        return wrapper
+    return decorator
+
+
+def context():
+    """Copy of the current context, to carry the run into a worker thread."""
+    return contextvars.copy_context()
+
+
+# ===== Export =====
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels, extra=()):
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def prometheus_text():
+    """Every metric in the Prometheus text exposition format."""
+    with _lock:
+        histograms = [(k, h.buckets, list(h.counts), h.count, h.total) for k, h in _histograms.items()]
+        counters = list(_counters.items())
+    lines = []
+    seen = set()
+    for (metric, labels), buckets, counts, count, total in sorted(histograms, key=lambda h: h[0]):
+        if metric not in seen:
+            seen.add(metric)
+            lines += [f"# HELP {metric} {HELP.get(metric, metric)}", f"# TYPE {metric} histogram"]
+        cumulative = 0
+        for bound, n in zip(buckets, counts):
+            cumulative += n
+            lines.append(f"{metric}_bucket{_label_text(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{metric}_bucket{_label_text(labels, (('le', '+Inf'),))} {count}")
+        lines.append(f"{metric}_sum{_label_text(labels)} {total:.6f}")
+        lines.append(f"{metric}_count{_label_text(labels)} {count}")
+    for (metric, labels), value in sorted(counters):
+        if metric not in seen:
+            seen.add(metric)
+            lines += [f"# HELP {metric} {HELP.get(metric, metric)}", f"# TYPE {metric} counter"]
+        lines.append(f"{metric}{_label_text(labels)} {value:g}")
+    for prefix, collect in sorted(_collectors.items()):
+        try:
+            values = collect()
+        except Exception as exc:
+            logger.warning("Collecting %s metrics failed: %s", prefix, exc)
+            continue
+        for name, value in sorted(values.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines += [f"# TYPE portfolio_{prefix}_{name} gauge", f"portfolio_{prefix}_{name} {value:g}"]
+    return "\n".join(lines) + "\n"
+
+
+def _maybe_write_textfile(force=False):
+    global _textfile_written
+    if not _textfile:
+        return
+    now = time.monotonic()
+    if not force and now - _textfile_written < TEXTFILE_INTERVAL:
+        return
+    _textfile_written = now
+    tmp = f"{_textfile}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_textfile) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, _textfile)  # scrapers never see a half-written file
+    except OSError as exc:
+        logger.warning("Could not write metrics to %s: %s", _textfile, exc)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ===== Operator panel =====
+def summary():
+    """Rows for the operator panel: one per histogram, with mean and max."""
+    with _lock:
+        items = sorted(_histograms.items(), key=lambda i: i[0])
+        rows = [{
+            "metric": metric.replace("portfolio_", ""),
+            "labels": ", ".join(f"{k}={v}" for k, v in labels),
+            "count": h.count,
+            "mean": h.total / h.count if h.count else 0.0,
+            "max": h.max,
+            "total": h.total,
+        } for (metric, labels), h in items]
+        requests = [{
+            "labels": ", ".join(f"{k}={v}" for k, v in labels),
+            "requests": value,
+        } for (metric, labels), value in sorted(_counters.items())]
+    return rows, requests
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
@@ -0,0 +1,197 @@
+import sys
+from dataclasses import dataclass
+
+# Typed, immutable records for the tables the page renders.
+# Each Airtable record is converted once when its table is (re)loaded, with
+# the field fallbacks ('startYear' or 'startDate', 'Technologies' or
+# 'Skills', ...) resolved here, so the rest of the app reads attributes
+# instead of probing dicts on every rerun. Models are slotted and hold
+# tuples only, so they are small, hashable and safe to share across sessions.
+
+
+@dataclass(frozen=True, slots=True)
+class Attachment:
+    id: str
+    url: str
+
+    @classmethod
+    def first(cls, value):
+        """The first attachment of an Airtable attachment field, or None."""
+        if not isinstance(value, list) or not value or not isinstance(value[0], dict):
+            return None
+        return cls(value[0].get('id', ''), value[0].get('url', ''))
+
+
+def _tuple(value):
+    if isinstance(value, str):
+        return (value,) if value else ()
+    return tuple(v for v in value or () if v)
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    id: str
+    name: str
+    description: str
+    tagline: str
+    linkedin: str
+    email: str
+    github: str
+    picture: Attachment | None
+    cv_url: str
+
+    FIELDS = ('Name', 'Description', 'tagline', 'linkedin', 'email', 'github', 'picture',
+              'cv', 'CV', 'resume', 'cvUrl')
+
+    @classmethod
+    def from_record(cls, record):
+        f = record.get('fields', {})
+        # A CV attachment or a direct URL
+        cv = Attachment.first(f.get('cv') or f.get('CV') or f.get('resume'))
+        return cls(
+            id=record.get('id', ''),
+            name=f.get('Name', ''),
+            description=f.get('Description', ''),
+            tagline=f.get('tagline', ''),
+            linkedin=f.get('linkedin', ''),
+            email=f.get('email', ''),
+            github=f.get('github', ''),
+            picture=Attachment.first(f.get('picture')),
+            cv_url=cv.url if cv else f.get('cvUrl', ''),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Experience:
+    id: str
+    role: str
+    company: str
+    location: str
+    start: str
+    end: str
+    description: str
+    technologies: tuple
+    link: str
+    logo: Attachment | None
+
+    FIELDS = ('Role', 'Company', 'Location', 'startYear', 'startDate', 'endYear', 'endDate',
+              'Description', 'Technologies', 'Skills', 'link_company', 'image_company')
+
+    @classmethod
+    def from_record(cls, record):
+        f = record.get('fields', {})
+        return cls(
+            id=record.get('id', ''),
+            role=f.get('Role', ''),
+            company=f.get('Company', ''),
+            location=f.get('Location', ''),
+            start=f.get('startYear') or f.get('startDate', ''),
+            end=f.get('endYear') or f.get('endDate') or 'Present',
+            description=f.get('Description', ''),
+            technologies=_tuple(f.get('Technologies') or f.get('Skills')),
+            link=f.get('link_company', ''),
+            logo=Attachment.first(f.get('image_company')),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Skill:
+    id: str
+    name: str
+    notes: str
+    level: int
+    start_year: str
+    categories: tuple  # never empty: 'Other' when the record has none
+    primary: str       # first category, used for grouping/sorting
+
+    FIELDS = ('Name', 'Notes', 'Level', 'startYear', 'Categories', 'Category')
+
+    @classmethod
+    def from_record(cls, record):
+        """Supports a 'Categories' multi-select or a 'Category' single-select."""
+        f = record.get('fields', {})
+        cats = f.get('Categories')
+        if cats is None:
+            cats = f.get('Category')
+        if not isinstance(cats, (str, list)):
+            cats = ()
+        cats = _tuple(cats) or ('Other',)
+        try:
+            level = int(f.get('Level', 0) or 0)
+        except (TypeError, ValueError):
+            level = 0
+        return cls(
+            id=record.get('id', ''),
+            name=f.get('Name', ''),
+            notes=f.get('Notes', ''),
+            level=level,
+            start_year=f.get('startYear', ''),
+            categories=cats,
+            primary=cats[0],
+        )
+
+    def years(self, year):
+        """Years of experience in ``year`` (-1 when unknown)."""
+        try:
+            return int(year) - int(self.start_year) if self.start_year else -1
+        except Exception:
+            return -1
+
+
+@dataclass(frozen=True, slots=True)
+class Project:
+    id: str
+    name: str
+    description: str
+    skills: tuple
+    knowledge: tuple
+    link: str
+    image: Attachment | None
+
+    FIELDS = ('Name', 'Description', 'skills', 'Knowledge', 'link', 'image')
+
+    @classmethod
+    def from_record(cls, record):
+        f = record.get('fields', {})
+        return cls(
+            id=record.get('id', ''),
+            name=f.get('Name', ''),
+            description=f.get('Description', ''),
+            skills=_tuple(f.get('skills')),
+            knowledge=_tuple(f.get('Knowledge')),
+            link=f.get('link', ''),
+            image=Attachment.first(f.get('image')),
+        )
+
+
+# Table name -> model of its records
+MODELS = {
+    "profile": Profile,
+    "experience": Experience,
+    "skills": Skill,
+    "projects": Project,
+}
+
+
+def build(name, records):
+    """Models for the records of table ``name`` (records as-is for other tables)."""
+    model = MODELS.get(name)
+    if model is None:
+        return records
+    return tuple(model.from_record(r) for r in records)
+
+
+def _sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(_sizeof(v) for v in value)
+    elif hasattr(value, "__slots__"):
+        size += sum(_sizeof(getattr(value, name)) for name in value.__slots__)
+    return size
+
+
+def nbytes(records):
+    """Estimated memory held by the models (or raw records) of one table."""
+    if isinstance(records, tuple):
+        return _sizeof(records)
+    return sys.getsizeof(records) + sum(sys.getsizeof(r) for r in records)
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+# Durable outbox for contact form submissions.
+# The button handler only appends to a local SQLite queue; a background
+# worker drains it to Airtable in batches, retrying with exponential backoff,
+# so visitors never wait on (or lose a message to) an Airtable error.
+
+BATCH_SIZE = 10        # Airtable's maximum records per create request
+DEDUP_WINDOW = 600     # seconds an identical submission is treated as a double-click
+BACKOFF_BASE = 2       # seconds before the first retry
+BACKOFF_MAX = 900      # longest wait between retries
+MAX_ATTEMPTS = 10      # after this the message is kept but no longer retried
+IDLE_POLL = 30         # seconds the worker sleeps when nothing is due
+CLAIM_LEASE = 120      # seconds a batch being sent is hidden from other drainers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    digest TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (sent_at, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_digest ON outbox (digest, created_at);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(fields):
+    normalized = {k: v.strip() if isinstance(v, str) else v for k, v in fields.items()}
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Outbox:
+    """SQLite-backed queue drained by a background thread.
+
+    ``send_batch(list_of_fields)`` performs the actual write (e.g. a
+    pyairtable ``batch_create`` on a rate-limited client); it must raise on
+    failure.
+    """
+
+    def __init__(self, path, send_batch):
+        self.path = path
+        self.send_batch = send_batch
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.failures = 0
+        self.duplicates = 0
+        self.latencies = []  # seconds from submit to sent, most recent last
+
+    # ===== Producer side =====
+    def submit(self, fields):
+        """Queue ``fields`` for creation; returns False for a duplicate submission."""
+        digest = _digest(fields)
+        now = time.time()
+        with self._lock, self._conn:
+            duplicate = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE digest = ? AND created_at > ?",
+                (digest, now - DEDUP_WINDOW),
+            ).fetchone()
+            if duplicate:
+                self.duplicates += 1
+                return False
+            self._conn.execute(
+                "INSERT INTO outbox (digest, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (digest, json.dumps(fields), now, now),
+            )
+        self._wake.set()
+        return True
+
+    # ===== Worker side =====
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="contact-outbox")
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception:
+                logger.exception("Contact outbox worker failed")
+                sent = 0
+            if not sent:
+                self._wake.wait(self._next_due_in())
+                self._wake.clear()
+
+    def _next_due_in(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE sent_at IS NULL AND attempts < ?",
+                (MAX_ATTEMPTS,),
+            ).fetchone()
+        if row[0] is None:
+            return IDLE_POLL
+        return min(IDLE_POLL, max(0.0, row[0] - time.time()))
+
+    def drain_once(self):
+        """Send one batch of due messages; returns how many were sent."""
+        now = time.time()
+        with self._lock, self._conn:
+            # Claim the batch in the same write transaction as the SELECT, so another
+            # drainer on this queue (a second worker or contact_server.py) skips it.
+            # If this process dies while sending, the batch is due again after the lease.
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT id, payload, created_at, attempts FROM outbox "
+                "WHERE sent_at IS NULL AND attempts < ? AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (MAX_ATTEMPTS, now, BATCH_SIZE),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + CLAIM_LEASE, rid) for rid, _, _, _ in rows],
+            )
+        if not rows:
+            return 0
+        try:
+            self.send_batch([json.loads(payload) for _, payload, _, _ in rows])
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("Sending %d contact message(s) failed: %s", len(rows), exc)
+            # The batch is retried together
+            retry_at = time.time() + self._backoff(max(attempts for _, _, _, attempts in rows))
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    [(retry_at, str(exc)[:500], rid) for rid, _, _, _ in rows],
+                )
+            return 0
+        sent_at = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET sent_at = ?, attempts = attempts + 1, last_error = NULL WHERE id = ?",
+                [(sent_at, rid) for rid, _, _, _ in rows],
+            )
+            self.sent += len(rows)
+            self.latencies = (self.latencies + [sent_at - created for _, _, created, _ in rows])[-100:]
+        return len(rows)
+
+    @staticmethod
+    def _backoff(attempts):
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempts))
+
+    # ===== Metrics =====
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            depth, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE sent_at IS NULL AND attempts < ?",
+                (MAX_ATTEMPTS,),
+            ).fetchone()
+            dead = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND attempts >= ?", (MAX_ATTEMPTS,)
+            ).fetchone()[0]
+            latencies = sorted(self.latencies)
+        return {
+            "depth": depth,
+            "oldest_age_seconds": round(now - oldest, 1) if oldest else 0.0,
+            "dead": dead,
+            "sent": self.sent,
+            "failures": self.failures,
+            "duplicates": self.duplicates,
+            "latency_p50_seconds": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "latency_max_seconds": round(latencies[-1], 3) if latencies else None,
+        }
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
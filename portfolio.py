@@ -1,10 +1,30 @@
 import streamlit as st
 import pandas as pd
-from pyairtable import Api
 from datetime import datetime
 
+import data
+import frontend
+import metrics
+import render
+import search
+import skills
+import tenants
+import webhooks
+
+# Portfolios served by this deployment: the owner's base, plus one [tenants.<slug>] table
+# per extra portfolio in the secrets (base_id, api_key, title, hosts), picked by ?p=<slug>
+# or the subdomain. MEMORY_BUDGET_MB bounds what every tenant caches together.
+tenants.configure(st.secrets.get("tenants", {}), st.secrets.get("MEMORY_BUDGET_MB"))
+tenants.register(tenants.DEFAULT, data.AIRTABLE_BASE_ID, st.secrets.AIRTABLE_API_KEY,  # Create the token at https://airtable.com/create/tokens
+                 title="Claudio E. Enobas Ese - Portfolio")
+tenant = tenants.resolve(st.query_params.get("p"), st.context.headers.get("Host"))
+if tenant is None:
+    st.error("There is no portfolio at this address.")
+    st.stop()
+tenants.activate(tenant)
+
 st.set_page_config(
-    page_title="Claudio E. Enobas Ese - Portfolio",
+    page_title=tenant.title or f"{tenant.slug} - Portfolio",
     page_icon="👨🏾‍💻",
     layout="wide",
     initial_sidebar_state="expanded",
@@ -15,364 +35,161 @@ st.set_page_config(
     },
 )
 
-# fallback "hard" via CSS to hide items
-HIDE_UI = """
-<style>
-#MainMenu {visibility: hidden;}
-header {visibility: hidden;}
-footer {visibility: hidden;}
-</style>
-"""
-st.markdown(HIDE_UI, unsafe_allow_html=True)
+# Optional instrumentation (METRICS = true in secrets): phase timings, Airtable calls and
+# st.html sizes, exported as Prometheus text to METRICS_FILE and/or 127.0.0.1:METRICS_PORT
+metrics.configure(st.secrets.get("METRICS", False), st.secrets.get("METRICS_FILE"), st.secrets.get("METRICS_PORT"))
+pageRun = metrics.start_run("page")
 
 # Load current year
 today = datetime.today().strftime("%Y")
 
-# Load MaterializeCSS, Material Icons and Font Awesome libraries
-st.markdown('<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/materialize/1.0.0/css/materialize.min.css">', unsafe_allow_html=True)
-st.markdown('<link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">', unsafe_allow_html=True)
-st.markdown('<link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.6.0/css/all.min.css" rel="stylesheet">', unsafe_allow_html=True)
-
-# Base custom styles (structure/spacing)
-customStyle ="""
-            <style type="text/css">
-            /*Increase the size of the cards*/
-            .card.large{
-                height:550px!important;
-            }
-            /*Increase available content space*/
-            .card.large .card-content{
-                max-height:fit-content!important;
-            }
-            /* Increase the font size of Streamlit tabs*/
-            button[data-baseweb="tab"] p{
-                font-size:20px!important;
-            }
-            /* Remove default Streamlit header spacing */
-            div[data-testid="stAppViewBlockContainer"]{
-                padding-top:0px;
-            }
-            </style>
-            """
-st.html(customStyle)
-
-# ===== Theme-aware accents (use Streamlit theme.primaryColor) =====
-def hex_to_rgb(hex_color: str):
-    h = hex_color.lstrip("#")
-    if len(h) == 3:
-        h = "".join([c*2 for c in h])
-    try:
-        r = int(h[0:2], 16)
-        g = int(h[2:4], 16)
-        b = int(h[4:6], 16)
-        return r, g, b
-    except Exception:
-        return 21, 101, 192  # fallback to #1565C0
-
+# Load the self-hosted CSS bundle (MaterializeCSS, Material Icons, Font Awesome and
+# the portfolio styles, built by build_assets.py) with the theme primary color
 primary_hex = st.get_option("theme.primaryColor") or "#1565C0"
-pr, pg, pb = hex_to_rgb(primary_hex)
-
-theme_css = f"""
-<style>
-  /* Buttons that used to be 'blue darken-3' or 'blue darken-3' now follow the theme primary */
-  .btn.blue.darken-3, .btn-large.blue.darken-3,
-  .btn.blue.darken-3, .btn-large.blue.darken-3 {{
-    background-color: {primary_hex} !important;
-  }}
-
-  /* Links that used 'blue-text text-darken-3' now follow the theme primary */
-  .blue-text.text-darken-3, .blue-text.text-darken-3 {{
-    color: {primary_hex} !important;
-  }}
-
-  /* Chips with blue/blue lighten-4 use a soft alpha of the primary */
-  .chip.blue.lighten-4, .chip.blue.lighten-4 {{
-    background-color: rgba({pr},{pg},{pb}, 0.14) !important;
-  }}
-
-  /* Timeline dot follows the primary */
-  .timeline-dot {{
-    background: {primary_hex};
-    box-shadow: 0 0 0 3px rgba({pr},{pg},{pb}, 0.10) inset;
-  }}
-
-  /* Make sure icons inherit current text color in both modes */
-  .card .card-title, .card .material-icons, .card .fa {{
-    color: inherit;
-  }}
-</style>
-"""
-st.html(theme_css)
-
-# Load the API Key
-AIRTABLE_API_KEY = st.secrets.AIRTABLE_API_KEY  # Create the token at https://airtable.com/create/tokens
-
-# Select Airtable base id
-AIRTABLE_BASE_ID='appjIL3JLyUSiFiyg'
-
-# Create the Airtable object
-api = Api(AIRTABLE_API_KEY)
-# Load the tables
-tblprofile = api.table(AIRTABLE_BASE_ID, 'profile')
-tblprojects = api.table(AIRTABLE_BASE_ID, 'projects')
-tblskills = api.table(AIRTABLE_BASE_ID, 'skills')
-tblContacts = api.table(AIRTABLE_BASE_ID, 'contacts')
-tblexperience = api.table(AIRTABLE_BASE_ID, 'experience')
+st.markdown(frontend.head_html(primary_hex), unsafe_allow_html=True)
+
+# Load the API Key and select the Airtable base id of this portfolio
+AIRTABLE_API_KEY = tenant.api_key
+AIRTABLE_BASE_ID = tenant.base_id
+
+# Create the tenant's Airtable client on its first visit (shared by its sessions): one pooled
+# keep-alive connection pool, rate limited per base, with (connect, read) timeouts in seconds
+airtableTimeout = (st.secrets.get("AIRTABLE_CONNECT_TIMEOUT", data.HTTP_TIMEOUT[0]),
+                   st.secrets.get("AIRTABLE_READ_TIMEOUT", data.HTTP_TIMEOUT[1]))
+# AIRTABLE_ENDPOINT_URL points every tenant at another API host (bench/airtable_server.py for load tests)
+data.configure(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, timeout=airtableTimeout,
+               endpoint_url=st.secrets.get("AIRTABLE_ENDPOINT_URL"))
+
+# Push invalidation (WEBHOOK_URL set): an Airtable webhook pings the receiver on WEBHOOK_PORT
+# (published at WEBHOOK_URL by the reverse proxy) and only the edited records are fetched again
+webhooks.subscribe(st.secrets.get("WEBHOOK_URL"), st.secrets.get("WEBHOOK_PORT"))
+
+# Manual cache invalidation hook: ?refresh=<REFRESH_TOKEN>
+refreshToken = st.secrets.get("REFRESH_TOKEN")
+if refreshToken and st.query_params.get("refresh") == refreshToken:
+    data.invalidate()
+
+# Lazy tabs: only the selected tab fetches its table and builds its HTML
+LAZY_TABS = st.secrets.get("LAZY_TABS", True)
+TABS = {'Experience': 'experience', 'Skills': 'skills', 'Projects': 'projects', 'Contact': None}
+if LAZY_TABS:
+    activeTables = [TABS[st.session_state.get('tab') or 'Experience']]
+else:
+    activeTables = list(TABS.values())
+
+# Load the tables this run needs at once (concurrently on a cold cache)
+snapshot = data.load_snapshot(['profile'] + [t for t in activeTables if t])
 
 # Load the values retrieved from the tables
-profile = tblprofile.all()[0]['fields']
-name=profile['Name']
-profileDescription=profile['Description']
-profileTagline=profile['tagline']
-linkedInLink=profile['linkedin']
-emailLink=profile['email']
-githubLink=profile['github']
-picture=profile['picture'][0]['url']
-
-# Try to read a CV attachment or a direct URL from the profile
-cvUrl = ''
-cv_att = profile.get('cv') or profile.get('CV') or profile.get('resume')
-if isinstance(cv_att, list) and cv_att:
-    cvUrl = cv_att[0].get('url', '')
-else:
-    cvUrl = profile.get('cvUrl', '')
-
-# Create the profile template with MaterializeCSS classes
-profileHTML=f"""
-<div class="row">
-<h1>{name} <span class="blue-text text-darken-3">Portfolio</span> </h1>
-<h5>{profileTagline}</h5>
-</div>
-<div class="row">
-    <div class="col s12 m12">
-        <div class="card">
-            <div class="card-content">
-                <div class="row">                    
-                    <div class="col s12 m2">
-                        <img class="circle responsive-img" src="{picture}">
-                    </div>
-                        <div class="col s12 m10 ">
-                            <span class="card-title">About me</span>
-                            <p>{profileDescription}</p>
-                            <div class="card-action">
-                                <a target="_blank" rel="noopener noreferrer" href="https://www.linkedin.com/in/claudioenobas/" class="blue-text text-darken-3"><i class="fa-brands fa-linkedin fa-2xl"></i></a>
-                                <a target="_blank" rel="noopener noreferrer" href="https://github.com/claudioen" class="blue-text text-darken-3"><i class="fa-brands fa-github fa-2xl"></i></a>
-                                <a href="mailto:claudioenobas@gmail.com" class="blue-text text-darken-3"><i class="fa fa-envelope fa-2xl"></i></a>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-            """
-st.html(profileHTML)
-
-# Create the Streamlit tabs
-tabExperience,tabSkils,tabPortfolio,tabContact = st.tabs(['Experience','Skills','Projects','Contact'])
+if not snapshot.profile:
+    st.error("The portfolio is temporarily unavailable, please try again in a moment.")
+    metrics.finish_run(pageRun)
+    st.stop()
+profile = snapshot.profile[0]
+cvUrl = profile.cv_url
+profileLinks = render.OWNER_LINKS if tenant.slug == tenants.DEFAULT else render.profile_links(profile)
+st.html(metrics.payload("profile", render.profile_html(profile, profileLinks)))
+
+# Search box: roles, skills and projects matching every word typed (prefixes too)
+SEARCH_LIMIT = 6  # results shown per table
+
+@st.fragment
+@tenants.scoped
+@metrics.section("search")
+def search_section():
+    query = st.text_input("Search", placeholder="Search roles, skills and projects, e.g. Kubernetes or fintech",
+                          label_visibility="collapsed")
+    if not query.strip():
+        return
+    # Only a search needs every table; the index is updated once per snapshot
+    snapshot = data.load_snapshot(['experience', 'skills', 'projects'])
+    index = search.search_index({'experience': snapshot.experience, 'skills': snapshot.skills,
+                                 'projects': snapshot.projects})
+    results = index.search(query, limit=SEARCH_LIMIT)
+    if not results:
+        st.caption(f"No roles, skills or projects match “{query}”.")
+        return
+    found = []
+    if results.get('experience'):
+        found.append(("Experience", render.experience_html(results['experience'], "Cards", primary_hex)))
+    if results.get('skills'):
+        found.append(("Skills", render.skills_html([(s, s.years(today)) for s in results['skills']], primary_hex)))
+    if results.get('projects'):
+        found.append(("Projects", render.projects_html(results['projects'], primary_hex)))
+    st.html(metrics.payload("search", render.search_html(found)))
+
+search_section()
 
 # Display the Experience tab
-with tabExperience:
-    # Optional CV download button
-    if cvUrl:
-        st.html(f'''
-        <div class="row">
-          <div class="col s12 right-align">
-            <a href="{cvUrl}" class="waves-effect waves-light btn-large white-text blue darken-3" target="_blank" rel="noopener">
-              <i class="material-icons left">file_download</i>Download CV
-            </a>
-          </div>
-        </div>
-        ''')
-
+# Each tab is a fragment: its widgets rerun only that section, not the profile header
+# (scoped: a fragment rerun serves the same tenant as the full run)
+@st.fragment
+@tenants.scoped
+@metrics.section("experience")
+def experience_section():
     # View switch: Timeline or Cards
     view_mode = st.selectbox("View", ["Timeline", "Cards"], index=0)
 
-    # Fetch records (sorted most recent first)
-    records = tblexperience.all(sort=['-startYear'])  # or '-startDate'
-
-    # ====== TIMELINE PRO CSS (responsive & consistent) ======
-    tl_pro_css = """
-    <style>
-      /* container + center rail */
-      .tl-pro { position: relative; margin: 8px 0 24px 0; max-width: 1100px; }
-      .tl-pro__rail { position: absolute; left: 50%; top: 0; bottom: 0; width: 3px; background: #e0e0e0; transform: translateX(-50%); }
-
-      /* items */
-      .tl-pro__item { position: relative; margin: 28px 0; }
-      .tl-pro__row { display: flex; gap: 18px; align-items: stretch; }
-      .tl-pro__col { flex: 1 1 0; max-width: 50%; }
-      .tl-pro__col--spacer { max-width: 50%; }
-
-      /* dot */
-      .tl-pro__dot { position: absolute; left: 50%; top: 12px; width: 14px; height: 14px; border-radius: 50%;
-                     background: var(--tl-primary, #1565c0); transform: translate(-50%, 0);
-                     box-shadow: 0 0 0 4px rgba(21,101,192,0.10) inset; }
-
-      /* card look */
-      .tl-pro .card { border-radius: 16px; overflow: hidden; }
-      .tl-pro .card-content { padding: 18px 18px 14px 18px; }
-      .tl-pro__meta { font-size: .95rem; color: #757575; margin: 2px 0 8px 0; }
-      .tl-pro__logo { width: 56px; height: 56px; border-radius: 50%; object-fit: cover; background: #fff; border: 1px solid #eee; flex: 0 0 56px; }
-      .tl-pro__header { display: flex; gap: 14px; align-items: center; margin-bottom: 6px; }
-      .tl-pro__title { font-size: 1.15rem; margin: 0; line-height: 1.25; }
-      .tl-pro__date { display: inline-block; font-size: .85rem; padding: 3px 10px; border-radius: 999px;
-                      background: rgba(21,101,192,0.10); color: #455a64; margin-bottom: 6px; }
-      .tl-pro__chips { display: flex; flex-wrap: wrap; gap: 8px; }
-      .tl-pro__chips .chip { margin: 0; }
-
-      /* tidy text spacing */
-      .tl-pro .card-content p { margin: 0 0 6px 0; }
-      .tl-pro .card-content ul { margin: 6px 0 0 18px; }
-
-      /* Alternate sides on desktop */
-      @media (min-width: 992px) {
-        .tl-pro__item:nth-child(odd) .tl-pro__row { flex-direction: row; }
-        .tl-pro__item:nth-child(even) .tl-pro__row { flex-direction: row-reverse; }
-      }
-
-      /* Mobile/tablet: single column */
-      @media (max-width: 991px) {
-        .tl-pro__rail { left: 12px; transform: none; }
-        .tl-pro__dot { left: 12px; }
-        .tl-pro__row { margin-left: 28px; gap: 12px; }
-        .tl-pro__col, .tl-pro__col--spacer { max-width: 100%; }
-        .tl-pro__col--spacer { display: none; }
-        .tl-pro__title { font-size: 1.05rem; }
-        .tl-pro__logo { width: 48px; height: 48px; }
-      }
-    </style>
-    """
-
-    # sync with Streamlit theme primary color
-    primary_hex = st.get_option("theme.primaryColor") or "#1565c0"
-    st.html(f"<style>:root{{--tl-primary:{primary_hex};}}</style>")
-
-    if view_mode == "Timeline":
-        st.html(tl_pro_css)
-
-        html = ['<div class="tl-pro">', '<div class="tl-pro__rail"></div>']
-        for rec in records:
-            f = rec.get('fields', {})
-            role = f.get('Role', '')
-            company = f.get('Company', '')
-            location = f.get('Location', '')
-            start = f.get('startYear') or f.get('startDate', '')
-            end = f.get('endYear') or f.get('endDate') or 'Present'
-            desc = f.get('Description', '')
-            techs = f.get('Technologies') or f.get('Skills') or []
-
-            companyLink = f.get('link_company', '')
-            companyImageList = f.get('image_company') or []
-            companyImageUrl = companyImageList[0]['url'] if companyImageList else ''
-
-            logo = f'<img class="tl-pro__logo" src="{companyImageUrl}">' if companyImageUrl else ''
-            if companyImageUrl and companyLink:
-                logo = f'<a href="{companyLink}" target="_blank" rel="noopener">{logo}</a>'
-
-            chips = "".join(f'<div class="chip green lighten-4">{v}</div>' for v in techs)
-
-            html.append(f"""
-            <div class="tl-pro__item">
-              <span class="tl-pro__dot"></span>
-              <div class="tl-pro__row">
-                <div class="tl-pro__col tl-pro__col--spacer"></div>
-                <div class="tl-pro__col">
-                  <div class="card small">
-                    <div class="card-content">
-                      <div class="tl-pro__header">
-                        {logo}
-                        <h3 class="tl-pro__title">{role} @ {company}</h3>
-                      </div>
-                      <div class="tl-pro__date">{start} – {end}</div>
-                      <div class="tl-pro__meta">{location}</div>
-                      <p>{desc}</p>
-                      <div class="section tl-pro__chips">{chips}</div>
-                    </div>
-                  </div>
-                </div>
-              </div>
-            </div>
-            """)
-        html.append("</div>")
-        st.html("".join(html))
+    # Records come sorted most recent first
+    snapshot = data.load_snapshot(['experience'])
+    records = snapshot.experience
+    if not snapshot.ok('experience') and not records:
+        st.warning("Experience could not be loaded right now.")
+
+    # One payload for the tab: the optional CV download button and the cards, which are
+    # rebuilt only for records that changed since the last rerun
+    st.html(metrics.payload("experience", render.experience_html(records, view_mode, primary_hex, cvUrl)))
+
+# Paginated grids: only the cards of the current page are built and shipped
+PAGE_SIZES = [12, 24, 48, 96]
+PAGE_SIZE = st.secrets.get("PAGE_SIZE", 24)  # default cards per page
+
+def turn_page(key, page):
+    st.session_state[key] = page
+
+# Its own fragment, so turning a page reruns only the grid
+@st.fragment
+@tenants.scoped
+@metrics.section("grid")
+def card_grid(key, section, items, pageSize, build):
+    pages = max(1, -(-len(items) // pageSize))
+    page = min(st.session_state.get(key, 1), pages)
+    start = (page - 1) * pageSize
+    st.html(metrics.payload(section, build(items[start:start + pageSize])))
+    if pages > 1:
+        colPrev, colInfo, colNext = st.columns([1, 2, 1])
+        colPrev.button("‹ Previous", key=f"{key}_prev", disabled=page <= 1,
+                       on_click=turn_page, args=(key, page - 1), width="stretch")
+        colInfo.caption(f"Page {page} of {pages} · {len(items)} cards")
+        colNext.button("Next ›", key=f"{key}_next", disabled=page >= pages,
+                       on_click=turn_page, args=(key, page + 1), width="stretch")
+
+def page_size_select(key):
+    return st.selectbox("Cards per page", PAGE_SIZES, key=key,
+                        index=PAGE_SIZES.index(PAGE_SIZE) if PAGE_SIZE in PAGE_SIZES else 1)
 
-    else:
-        # Fallback: original card grid
-        exp_cards = ""
-        for rec in records:
-            f = rec.get('fields', {})
-            role = f.get('Role', '')
-            company = f.get('Company', '')
-            location = f.get('Location', '')
-            start = f.get('startYear') or f.get('startDate', '')
-            end = f.get('endYear') or f.get('endDate') or 'Present'
-            desc = f.get('Description', '')
-            techs = f.get('Technologies') or f.get('Skills') or []
-            companyLink = f.get('link_company', '')
-            companyImageList = f.get('image_company') or []
-            companyImageUrl = companyImageList[0]['url'] if companyImageList else ''
-
-            img_html = f'<img src="{companyImageUrl}">' if companyImageUrl else ""
-            if companyImageUrl and companyLink:
-                img_html = f'<a href="{companyLink}" target="_blank" rel="noopener">{img_html}</a>'
-
-            chips = "".join(f'<div class="chip green lighten-4">{v}</div>' for v in techs)
-
-            exp_cards += f"""
-            <div class="col s12 m6">
-              <div class="card large">
-                <div class="card-image" style="height:150px">{img_html}</div>
-                <div class="card-content">
-                  <span class="card-title">{role} @ {company}</span>
-                  <p class="grey-text">{location} • {start} – {end}</p>
-                  <p>{desc}</p>
-                  <div class="section">{chips}</div>
-                </div>
-              </div>
-            </div>
-            """
-        st.html(f'<div class="row">{exp_cards}</div>' if exp_cards else '<div class="row"><div class="col s12"><p>No experience added yet.</p></div></div>')
 # Display the Skills tab
-with tabSkils:
+@st.fragment
+@tenants.scoped
+@metrics.section("skills")
+def skills_section():
     # Load skills once
-    raw_records = tblskills.all(sort=['-Level'])
-
-    # Normalize records (supports 'Categories' multi-select or 'Category' single-select)
-    items = []
-    for r in raw_records:
-        f = r.get('fields', {})
-        name = f.get('Name', '')
-        notes = f.get('Notes', '')
-        level = int(f.get('Level', 0) or 0)
-        start_year = f.get('startYear', '')
-        # Categories handling
-        cats = f.get('Categories')
-        if cats is None:
-            cats = f.get('Category')
-        if isinstance(cats, str):
-            cats = [cats]
-        if not isinstance(cats, list):
-            cats = []
-        cats = [c for c in cats if c] or ['Other']
-
-        items.append({
-            "name": name,
-            "notes": notes,
-            "level": level,
-            "start_year": start_year,
-            "categories": cats,
-            "primary": cats[0]  # first category as primary for grouping/sorting
-        })
-
-    if not items:
+    snapshot = data.load_snapshot(['skills'])
+    raw_records = snapshot.skills
+    if not snapshot.ok('skills') and not raw_records:
+        st.warning("Skills could not be loaded right now.")
+
+    # Normalized, indexed skills (built once per snapshot)
+    index = skills.skill_index(raw_records, today)
+
+    if not len(index):
         st.html('<p>No skills found.</p>')
     else:
         # Build available categories
-        all_categories = sorted({c for it in items for c in it["categories"]})
+        all_categories = index.categories
 
         # UI controls
-        col1, col2 = st.columns([2,2])
+        col1, col2, col3 = st.columns([2,2,1])
         with col1:
             selected_cats = st.multiselect(
                 "Filter by categories",
@@ -383,132 +200,38 @@ with tabSkils:
         with col2:
             sort_choice = st.selectbox(
                 "Sort by",
-                [
-                    "Primary category (A→Z), Level (High→Low)",
-                    "Level (High→Low)",
-                    "Experience (High→Low)",
-                    "Name (A→Z)"
-                ],
+                skills.SORT_OPTIONS,
                 index=0
             )
-
-        # Apply category filter (keep skills having at least one selected category)
-        if selected_cats:
-            filtered = [it for it in items if any(c in selected_cats for c in it["categories"])]
-        else:
-            filtered = items
-
-        # Helpers
-        def years_of_exp(it):
-            try:
-                return int(today) - int(it["start_year"]) if it["start_year"] else -1
-            except Exception:
-                return -1
-
-        # Sorting
-        if sort_choice == "Level (High→Low)":
-            filtered.sort(key=lambda it: (-it["level"], it["name"].lower()))
-        elif sort_choice == "Experience (High→Low)":
-            filtered.sort(key=lambda it: (-years_of_exp(it), -it["level"], it["name"].lower()))
-        elif sort_choice == "Name (A→Z)":
-            filtered.sort(key=lambda it: it["name"].lower())
-        else:  # "Primary category (A→Z), Level (High→Low)"
-            filtered.sort(key=lambda it: (it["primary"].lower(), -it["level"], it["name"].lower()))
-
-        # Build HTML cards (same style)
-        skills_html = ""
-        for it in filtered:
-            # Stars
-            stars = "".join(
-                '<i class="material-icons">star</i>' if i <= it["level"] else '<i class="material-icons">star_border</i>'
-                for i in range(1, 6)
-            )
-            # Experience text
-            yrs = years_of_exp(it)
-            since_txt = f'{it["start_year"]} - More than {yrs} years' if yrs >= 0 else '—'
-            # Category chips (use theme primary via CSS override)
-            chips = "".join(f'<div class="chip blue lighten-4" style="margin-top:6px">{c}</div>' for c in it["categories"])
-
-            skillHTML = f"""                    
-                <div class="col s12 m4">
-                    <div class="card small">
-                        <div class="card-content">
-                            <span class="card-title">{it["name"]}</span>
-                            <p>{it["notes"]}</p>
-                            <div class="section">{chips}</div>
-                        </div>
-                        <div class="card-action">
-                            <div class="col s12 m6">
-                                <p>Level:<br/>{stars}</p>
-                            </div>
-                            <div class="col s12 m6">
-                                <p>Since:<br/>{since_txt}</p>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            """
-            skills_html += skillHTML
-
-        container_html = f'<div class="row">{skills_html}</div>'
-        st.html(container_html)
-
-with tabPortfolio:
-    projects=""
-    skillsHTML=""
-    knowledgeHTML=""
-    # Loop creating the project templates
-    for project in tblprojects.all():
-        projectid= project['id']
-        project=project["fields"]
-        projectName = project['Name']
-        projectDescription = project['Description']
-        # Create the list of Skills and Knowledge
-        projectSkils = project['skills']
-        skillsHTML=[f'<div class="chip green lighten-4">{p}</div>' for p in projectSkils]
-        skillsHTML="".join(skillsHTML)
-        projectKnowledge = project['Knowledge']
-        knowledgeHTML=[f'<div class="chip blue lighten-4">{p}</div>' for p in projectKnowledge]
-        knowledgeHTML="".join(knowledgeHTML)
-
-        projectLink = project['link']
-        projectImageUrl = project['image'][0]['url']
-        # Project card template
-        projectHTML = f"""                    
-                <div class="col s12 m6">
-                    <div class="card large">                    
-                        <div class="card-image" style="height:200px">
-                            <a href="{projectLink}"><img src="{projectImageUrl}"></a>
-                        </div>                        
-                        <div class="card-content">
-                            <span class="card-title">{projectName}</span>                                                        
-                            <p>{projectDescription}</p>
-                            <div class="row hide-on-small-only">
-                            <div class="col s12 m6">
-                            <h6>Knowledge:</h6>
-                            {knowledgeHTML}
-                            </div>
-                            <div class="col s12 m6">
-                            <h6>Skills:</h6>
-                            {skillsHTML}
-                            </div>
-                            </div>
-                        </div>  
-                        <div class="card-action right-align">
-                        <a target="_blank" rel="noopener noreferrer" href="{projectLink}" class="waves-effect waves-light btn-large white-text blue darken-3"><i class="material-icons left">open_in_new</i>View</a>                        
-                        </div>                                               
-                    </div>
-                </div>
-                    """
-        projects=projects+projectHTML
-    projectsHTML=f"""
-            <div class="row">            
-                {projects}       
-            </div>       
-        """
-    st.html(projectsHTML)
-
-with tabContact:
+        with col3:
+            pageSize = page_size_select("skills_page_size")
+
+        # Apply category filter (keep skills having at least one selected category) and sort
+        filtered = index.query(selected_cats, sort_choice)
+
+        # A new filter, sort or page size starts again from the first page
+        gridState = (tuple(selected_cats), sort_choice, pageSize)
+        if st.session_state.get("skills_grid") != gridState:
+            st.session_state["skills_grid"] = gridState
+            st.session_state["skills_page"] = 1
+        card_grid("skills_page", "skills", filtered, pageSize, lambda page: render.skills_html(page, primary_hex))
+
+@st.fragment
+@tenants.scoped
+@metrics.section("projects")
+def projects_section():
+    snapshot = data.load_snapshot(['projects'])
+    pageSize = page_size_select("projects_page_size")
+    # A new page size starts again from the first page
+    if st.session_state.get("projects_grid") != pageSize:
+        st.session_state["projects_grid"] = pageSize
+        st.session_state["projects_page"] = 1
+    card_grid("projects_page", "projects", snapshot.projects, pageSize,
+              lambda page: render.projects_html(page, primary_hex))
+
+@st.fragment
+@tenants.scoped
+def contact_section():
     st.info("If you think I can help you with some of your projects or entrepreneurships, send me a message I'll contact you as soon as I can. I'm always glad to help")
     with st.container(border=True):
         parName = st.text_input("Your name")
@@ -517,8 +240,55 @@ with tabContact:
         parNotes = st.text_area("What can I do for you")
         btnEnviar = st.button("Send",type="primary")
     if btnEnviar:
-        # Create the contact record
-        tblContacts.create({"Name":parName,"email":parEmail,"phoneNumber":parPhoneNumber,"Notes":parNotes})
-        st.toast("Message sent")
+        # Queue the contact record (sent to Airtable in the background)
+        if data.submit_contact({"Name":parName,"email":parEmail,"phoneNumber":parPhoneNumber,"Notes":parNotes}):
+            st.toast("Message sent")
+        else:
+            st.toast("Message already sent")
 
-st.markdown('<script src="https://cdnjs.cloudflare.com/ajax/libs/materialize/1.0.0/js/materialize.min.js"></script>', unsafe_allow_html=True)
+# Create the Streamlit tabs (tracking the selection makes hidden tabs skip their work)
+if LAZY_TABS:
+    tabExperience,tabSkils,tabPortfolio,tabContact = st.tabs(list(TABS), key='tab', on_change='rerun')
+else:
+    tabExperience,tabSkils,tabPortfolio,tabContact = st.tabs(list(TABS))
+
+# .open is None when tabs don't track state, so every tab renders
+with tabExperience:
+    if tabExperience.open is not False:
+        experience_section()
+with tabSkils:
+    if tabSkils.open is not False:
+        skills_section()
+with tabPortfolio:
+    if tabPortfolio.open is not False:
+        projects_section()
+with tabContact:
+    if tabContact.open is not False:
+        contact_section()
+
+metrics.finish_run(pageRun)
+
+# Drop the caches of the coldest portfolios when every tenant together is over budget
+tenants.enforce_budget()
+
+# Hidden operator panel: ?ops=<OPS_TOKEN>
+opsToken = st.secrets.get("OPS_TOKEN")
+if opsToken and st.query_params.get("ops") == opsToken:
+    with st.sidebar:
+        st.subheader("Operator panel")
+        if not metrics.enabled:
+            st.caption("Set METRICS = true in the secrets to collect phase timings.")
+        phaseRows, requestRows = metrics.summary()
+        if phaseRows:
+            st.dataframe(pd.DataFrame(phaseRows), hide_index=True)
+        if requestRows:
+            st.dataframe(pd.DataFrame(requestRows), hide_index=True)
+        st.caption("Tenants")
+        st.dataframe(pd.DataFrame(tenants.stats()), hide_index=True)
+        st.caption("Caches")
+        st.dataframe(pd.DataFrame(list(data.cache_stats().values()) + [render.cache_stats()]), hide_index=True)
+        st.caption("Airtable client, contact outbox and webhooks")
+        st.json({"airtable": data.client_stats(), "outbox": data.outbox_stats(), "webhooks": webhooks.stats()},
+                expanded=False)
+        with st.expander("Prometheus text"):
+            st.code(metrics.prometheus_text(), language="text")
@@ -0,0 +1,88 @@
+import threading
+import time
+
+# Token bucket shared by every Airtable request of a base.
+# Airtable allows 5 requests per second per base; reads, contact writes and
+# background refreshes all draw from the same bucket so bursts queue up here
+# instead of coming back as 429s.
+
+# A full bucket plus a second of refill must stay within Airtable's 5 per
+# second, or a burst earns the base a 30 second penalty of 429s.
+AIRTABLE_RATE = 4      # requests per second per base
+AIRTABLE_BURST = 1     # tokens available at once
+
+
+class TokenBucket:
+    def __init__(self, rate=AIRTABLE_RATE, capacity=AIRTABLE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0.0  # total seconds callers spent waiting for a token
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to ``timeout`` seconds (forever if None).
+
+        Returns False if no token became available in time.
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    self.waited += now - start
+                    return True
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            if timeout is not None and now - start + delay > timeout:
+                return False
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Hand out no token for ``seconds`` (e.g. after Airtable answered 429)."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "rate": self.rate,
+                "tokens": round(self._tokens, 2),
+                "paused_seconds": round(max(0.0, self._paused_until - now), 1),
+                "acquired": self.acquired,
+                "waited_seconds": round(self.waited, 3),
+            }
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(base_id):
+    """The TokenBucket of ``base_id``, shared by every client of that base.
+
+    Airtable limits each base on its own, so every base gets its own bucket
+    and a busy portfolio never waits on another one's tokens.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(base_id)
+        if bucket is None:
+            bucket = _buckets[base_id] = TokenBucket()
+        return bucket
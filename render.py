@@ -0,0 +1,313 @@
+import sys
+from functools import lru_cache
+
+import images
+import metrics
+import tenants
+from cache import TTLCache
+from templates import Markup, Template, join
+
+# HTML builders for the header and the experience, skills and projects cards.
+# The markup lives in templates (templates.py) compiled at import; Airtable
+# values are escaped as they are inserted. Each card is cached under its
+# record (models are immutable and hash by value), the view mode and the
+# theme, so a rerun only formats the records that actually changed. Every
+# tenant has its own cache, bounded in bytes.
+
+FRAGMENT_CACHE_SIZE = 5000  # cards kept per tenant, across its sessions
+FRAGMENT_CACHE_BYTES = 32 * 1024 * 1024  # and the most card HTML a tenant may hold
+
+
+def _fragments():
+    return tenants.current().local("html", lambda: TTLCache(
+        ttl=float("inf"), stale_ttl=0, maxsize=FRAGMENT_CACHE_SIZE, name="html",
+        maxbytes=FRAGMENT_CACHE_BYTES, sizeof=sys.getsizeof,
+    ))
+
+
+def cached_fragment(kind, builder, record, *args, theme=""):
+    """Return ``builder(record, *args)``, reusing the HTML of an identical earlier call."""
+    # images.version() changes the key once new attachments are available locally
+    key = (kind, record, *args, theme, images.version())
+    return _fragments().get(key, lambda: builder(record, *args))
+
+
+def invalidate():
+    _fragments().invalidate()
+
+
+def forget(records):
+    """Drop the cards built from ``records`` (old versions of edited or deleted records)."""
+    records = set(records)
+    if not records:
+        return 0
+    return _fragments().discard(lambda key: key[1] in records)
+
+
+def cache_stats():
+    return _fragments().stats()
+
+
+# ===== Profile =====
+# The owner's links; other portfolios link what their profile record holds
+OWNER_LINKS = {
+    "linkedin": "https://www.linkedin.com/in/claudioenobas/",
+    "github": "https://github.com/claudioen",
+    "email": "claudioenobas@gmail.com",
+}
+
+
+def profile_links(profile):
+    return {"linkedin": profile.linkedin, "github": profile.github, "email": profile.email}
+
+
+PROFILE = Template("""
+<div class="row">
+<h1>{{ name }} <span class="blue-text text-darken-3">Portfolio</span> </h1>
+<h5>{{ tagline }}</h5>
+</div>
+<div class="row">
+    <div class="col s12 m12">
+        <div class="card">
+            <div class="card-content">
+                <div class="row">
+                    <div class="col s12 m2">
+                        <img class="circle responsive-img" {{ picture }}>
+                    </div>
+                        <div class="col s12 m10 ">
+                            <span class="card-title">About me</span>
+                            <p>{{ description }}</p>
+                            <div class="card-action">{{ actions }}</div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    </div>
+""")
+# One template per icon: build_assets.py keeps only the classes written out literally
+LINKEDIN_ICON = Template("""
+<a target="_blank" rel="noopener noreferrer" href="{{ href|url }}" class="blue-text text-darken-3"><i class="fa-brands fa-linkedin fa-2xl"></i></a>
+""")
+GITHUB_ICON = Template("""
+<a target="_blank" rel="noopener noreferrer" href="{{ href|url }}" class="blue-text text-darken-3"><i class="fa-brands fa-github fa-2xl"></i></a>
+""")
+MAIL_ICON = Template("""
+<a href="mailto:{{ email }}" class="blue-text text-darken-3"><i class="fa fa-envelope fa-2xl"></i></a>
+""")
+CV_BUTTON = Template("""
+<div class="row">
+  <div class="col s12 right-align">
+    <a href="{{ url|url }}" class="waves-effect waves-light btn-large white-text blue darken-3" target="_blank" rel="noopener">
+      <i class="material-icons left">file_download</i>Download CV
+    </a>
+  </div>
+</div>
+""")
+
+
+def profile_html(profile, links=OWNER_LINKS):
+    """Header with the name, tagline, picture and about me card for a models.Profile."""
+    actions = []
+    if links.get("linkedin"):
+        actions.append(LINKEDIN_ICON.render(href=links["linkedin"]))
+    if links.get("github"):
+        actions.append(GITHUB_ICON.render(href=links["github"]))
+    if links.get("email"):
+        actions.append(MAIL_ICON.render(email=links["email"]))
+    return PROFILE.render(
+        name=profile.name, tagline=profile.tagline, description=profile.description,
+        picture=images.img_attrs(profile.picture, 'hero', lazy=False), actions=join(actions),
+    )
+
+
+def cv_button_html(url):
+    return CV_BUTTON.render(url=url)
+
+
+# ===== Experience =====
+# Colour classes written out, so build_assets.py keeps them in the bundle
+CHIPS = {
+    "green": Template('<div class="chip green lighten-4">{{ value }}</div>'),
+    "blue": Template('<div class="chip blue lighten-4">{{ value }}</div>'),
+}
+LINKED = Template('<a href="{{ href|url }}" target="_blank" rel="noopener">{{ body }}</a>')
+LOGO = Template('<img class="tl-pro__logo" {{ attrs }}>')
+IMAGE = Template('<img {{ attrs }}>')
+TIMELINE_ITEM = Template("""
+<div class="tl-pro__item">
+  <span class="tl-pro__dot"></span>
+  <div class="tl-pro__row">
+    <div class="tl-pro__col tl-pro__col--spacer"></div>
+    <div class="tl-pro__col">
+      <div class="card small">
+        <div class="card-content">
+          <div class="tl-pro__header">{{ logo }}<h3 class="tl-pro__title">{{ role }} @ {{ company }}</h3>
+          </div>
+          <div class="tl-pro__date">{{ start }} – {{ end }}</div>
+          <div class="tl-pro__meta">{{ location }}</div>
+          <p>{{ description }}</p>
+          <div class="section tl-pro__chips">{{ chips }}</div>
+        </div>
+      </div>
+    </div>
+  </div>
+</div>
+""")
+EXPERIENCE_CARD = Template("""
+<div class="col s12 m6">
+  <div class="card large">
+    <div class="card-image" style="height:150px">{{ image }}</div>
+    <div class="card-content">
+      <span class="card-title">{{ role }} @ {{ company }}</span>
+      <p class="grey-text">{{ location }} • {{ start }} – {{ end }}</p>
+      <p>{{ description }}</p>
+      <div class="section">{{ chips }}</div>
+    </div>
+  </div>
+</div>
+""")
+TIMELINE = Template('<div class="tl-pro"><div class="tl-pro__rail"></div>{{ items }}</div>')
+GRID = Template('<div class="row">{{ cards }}</div>')
+NO_EXPERIENCE = Markup('<div class="row"><div class="col s12"><p>No experience added yet.</p></div></div>')
+
+
+@lru_cache(maxsize=4096)
+def _chip(color, value):
+    # the same technologies and skills come back on most cards
+    return CHIPS[color].render(value=value)
+
+
+def _chips(values, color):
+    return join([_chip(color, v) for v in values])
+
+
+def _linked(img, e):
+    if e.link:
+        return LINKED.render(href=e.link, body=img)
+    return img
+
+
+def timeline_item(e):
+    logo = ''
+    if e.logo:
+        logo = _linked(LOGO.render(attrs=images.img_attrs(e.logo, "logo")), e)
+    return TIMELINE_ITEM.render(
+        logo=logo, role=e.role, company=e.company, start=e.start, end=e.end, location=e.location,
+        description=e.description, chips=_chips(e.technologies, "green"),
+    )
+
+
+def experience_card(e):
+    img_html = ""
+    if e.logo:
+        img_html = _linked(IMAGE.render(attrs=images.img_attrs(e.logo, "card")), e)
+    return EXPERIENCE_CARD.render(
+        image=img_html, role=e.role, company=e.company, start=e.start, end=e.end, location=e.location,
+        description=e.description, chips=_chips(e.technologies, "green"),
+    )
+
+
+def experience_html(records, view_mode, theme="", cv_url=None):
+    """Timeline or card grid for models.Experience records, after the CV button if ``cv_url``."""
+    button = cv_button_html(cv_url) if cv_url else ""
+    if view_mode == "Timeline":
+        with metrics.phase("render_timeline"):
+            items = [cached_fragment("timeline", timeline_item, e, theme=theme) for e in records]
+            return join((button, TIMELINE.render(items=join(items))))
+    with metrics.phase("render_cards"):
+        cards = [cached_fragment("experience", experience_card, e, theme=theme) for e in records]
+    if not cards:
+        return join((button, NO_EXPERIENCE))
+    return join((button, GRID.render(cards=join(cards))))
+
+
+# ===== Skills =====
+STAR = Markup('<i class="material-icons">star</i>')
+NO_STAR = Markup('<i class="material-icons">star_border</i>')
+CATEGORY_CHIP = Template('<div class="chip blue lighten-4" style="margin-top:6px">{{ value }}</div>')
+SKILL_CARD = Template("""
+<div class="col s12 m4">
+    <div class="card small">
+        <div class="card-content">
+            <span class="card-title">{{ name }}</span>
+            <p>{{ notes }}</p>
+            <div class="section">{{ chips }}</div>
+        </div>
+        <div class="card-action">
+            <div class="col s12 m6">
+                <p>Level:<br/>{{ stars }}</p>
+            </div>
+            <div class="col s12 m6">
+                <p>Since:<br/>{{ since }}</p>
+            </div>
+        </div>
+    </div>
+</div>
+""")
+
+
+def skill_card(skill, yrs):
+    # Stars
+    stars = join(STAR if i <= skill.level else NO_STAR for i in range(1, 6))
+    # Experience text
+    since_txt = f'{skill.start_year} - More than {yrs} years' if yrs >= 0 else '—'
+    # Category chips (use theme primary via CSS override)
+    chips = join([CATEGORY_CHIP.render(value=c) for c in skill.categories])
+    return SKILL_CARD.render(name=skill.name, notes=skill.notes, chips=chips, stars=stars, since=since_txt)
+
+
+@metrics.timed("render_skills")
+def skills_html(items, theme=""):
+    """Card grid for (models.Skill, years of experience) pairs."""
+    cards = [cached_fragment("skill", skill_card, skill, yrs, theme=theme) for skill, yrs in items]
+    return GRID.render(cards=join(cards))
+
+
+# ===== Projects =====
+PROJECT_CARD = Template("""
+<div class="col s12 m6">
+    <div class="card large">
+        <div class="card-image" style="height:200px">
+            <a href="{{ link|url }}"><img {{ image }}></a>
+        </div>
+        <div class="card-content">
+            <span class="card-title">{{ name }}</span>
+            <p>{{ description }}</p>
+            <div class="row hide-on-small-only">
+            <div class="col s12 m6">
+            <h6>Knowledge:</h6>{{ knowledge }}</div>
+            <div class="col s12 m6">
+            <h6>Skills:</h6>{{ skills }}</div>
+            </div>
+        </div>
+        <div class="card-action right-align">
+        <a target="_blank" rel="noopener noreferrer" href="{{ link|url }}" class="waves-effect waves-light btn-large white-text blue darken-3"><i class="material-icons left">open_in_new</i>View</a>
+        </div>
+    </div>
+</div>
+""")
+
+
+def project_card(project):
+    return PROJECT_CARD.render(
+        link=project.link, image=images.img_attrs(project.image, "card"), name=project.name,
+        description=project.description, knowledge=_chips(project.knowledge, "blue"),
+        skills=_chips(project.skills, "green"),
+    )
+
+
+@metrics.timed("render_projects")
+def projects_html(records, theme=""):
+    """Card grid for models.Project records."""
+    cards = [cached_fragment("project", project_card, p, theme=theme) for p in records]
+    return GRID.render(cards=join(cards))
+
+
+# ===== Search =====
+SEARCH_GROUP = Template('<h5>{{ title }}</h5>{{ body }}')
+
+
+def search_html(groups):
+    """Result groups ((title, HTML) pairs) as one block."""
+    return join(SEARCH_GROUP.render(title=title, body=body) for title, body in groups)
@@ -0,0 +1,166 @@
+import bisect
+import math
+import re
+import threading
+import unicodedata
+
+import metrics
+import tenants
+
+# In-memory full-text search over experience, skills and projects.
+# An inverted index (term -> {record: weight}) is built from the models of a
+# snapshot and kept up to date incrementally: when a table is reloaded only
+# the records that changed are re-tokenized. Queries match every word as a
+# prefix ("kube" finds Kubernetes) against a sorted vocabulary and rank by
+# field weight and term rarity, without touching the records themselves.
+
+# Table -> (model attribute, weight) indexed for its records
+FIELDS = {
+    "experience": [("role", 3), ("company", 3), ("technologies", 2), ("description", 1)],
+    "skills": [("name", 3), ("categories", 2), ("notes", 1)],
+    "projects": [("name", 3), ("skills", 2), ("knowledge", 2), ("description", 1)],
+}
+PREFIX_FACTOR = 0.6    # a prefix match weighs less than the whole word
+MAX_EXPANSIONS = 200   # vocabulary terms a single prefix may expand to
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercase words of ``text`` with accents removed ('Gestión' -> 'gestion')."""
+    text = str(text).lower()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _WORD.findall(text)
+
+
+def _weights(record, fields):
+    weights = {}
+    for attr, weight in fields:
+        value = getattr(record, attr, "")
+        for part in value if isinstance(value, tuple) else (value,):
+            for term in tokenize(part):
+                weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+class SearchIndex:
+    """Inverted index of models, keyed by (table, record id)."""
+
+    def __init__(self, fields=FIELDS):
+        self.fields = fields
+        self._lock = threading.RLock()
+        self._postings = {}  # term -> {(table, id): weight}
+        self._terms = []     # sorted vocabulary, for prefix lookups
+        self._docs = {}      # (table, id) -> (record, {term: weight})
+        self._seen = {}      # table -> records object last indexed
+        self._entries = 0    # postings across every term
+
+    def __len__(self):
+        return len(self._docs)
+
+    def nbytes(self):
+        """Rough footprint: dict slots per posting, vocabulary strings, one entry per document."""
+        return 100 * self._entries + 80 * len(self._terms) + 300 * len(self._docs)
+
+    def _add(self, key, record):
+        terms = _weights(record, self.fields[key[0]])
+        self._docs[key] = (record, terms)
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[key] = weight
+        self._entries += len(terms)
+
+    def _remove(self, key):
+        _, terms = self._docs.pop(key)
+        self._entries -= len(terms)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def update(self, table, records):
+        """Index the current ``records`` of ``table``; returns how many were (re)indexed.
+
+        Unchanged records (equal models) are left alone, so a reload only
+        costs the records that were added, edited or deleted.
+        """
+        with self._lock:
+            if self._seen.get(table) is records:
+                return 0
+            current = {(table, r.id): r for r in records}
+            changed = 0
+            for key in [k for k in self._docs if k[0] == table and k not in current]:
+                self._remove(key)
+                changed += 1
+            for key, record in current.items():
+                doc = self._docs.get(key)
+                if doc is not None and doc[0] == record:
+                    continue
+                if doc is not None:
+                    self._remove(key)
+                self._add(key, record)
+                changed += 1
+            self._seen[table] = records
+            return changed
+
+    def _expand(self, token):
+        """Vocabulary terms starting with ``token``, with their match factor."""
+        start = bisect.bisect_left(self._terms, token)
+        for term in self._terms[start:start + MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            yield term, 1.0 if term == token else PREFIX_FACTOR
+
+    @metrics.timed("search_query")
+    def search(self, query, limit=10):
+        """Records matching every word of ``query`` (as a prefix), best first, per table."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return {}
+        with self._lock:
+            total = len(self._docs) or 1
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for term, factor in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    for key, weight in postings.items():
+                        score = weight * factor * idf
+                        if score > token_scores.get(key, 0):
+                            token_scores[key] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {k: s + token_scores[k] for k, s in scores.items() if k in token_scores}
+                if not scores:
+                    return {}
+            results = {}
+            for key, score in sorted(scores.items(), key=lambda i: -i[1]):
+                hits = results.setdefault(key[0], [])
+                if len(hits) < limit:
+                    hits.append(self._docs[key][0])
+            return results
+
+
+def search_index(tables):
+    """The current tenant's SearchIndex, updated with ``tables`` ({table: models}).
+
+    One index per tenant, shared by its sessions; it follows the snapshots
+    of the tables it is given.
+    """
+    index = tenants.current().local("search", SearchIndex)
+    with metrics.phase("search_index"):
+        for table, records in tables.items():
+            index.update(table, records)
+    return index
+
+
+def invalidate():
+    tenants.current().put("search", None)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+import metrics
+import tenants
+
+# Columnar query engine for the Skills tab.
+# The models.Skill records of a snapshot are indexed once into a DataFrame
+# with every sort order and a category -> rows bitmask precomputed, so
+# filtering and sorting a rerun are array lookups instead of Python loops
+# over every skill.
+
+SORT_OPTIONS = [
+    "Primary category (A→Z), Level (High→Low)",
+    "Level (High→Low)",
+    "Experience (High→Low)",
+    "Name (A→Z)",
+]
+
+# Sort mode -> (columns, ascending)
+_SORT_KEYS = {
+    SORT_OPTIONS[0]: (["primary_key", "level", "name_key"], [True, False, True]),
+    SORT_OPTIONS[1]: (["level", "name_key"], [False, True]),
+    SORT_OPTIONS[2]: (["years", "level", "name_key"], [False, False, True]),
+    SORT_OPTIONS[3]: (["name_key"], [True]),
+}
+
+
+class SkillIndex:
+    """models.Skill records with precomputed sort orders and category bitmasks."""
+
+    def __init__(self, skills, year):
+        self.source = skills
+        self.year = year
+        # (skill, years of experience) pairs, as the cards render them
+        self.items = [(s, s.years(year)) for s in skills]
+        self.frame = pd.DataFrame({
+            "name_key": [str(s.name).lower() for s, _ in self.items],
+            "primary_key": [str(s.primary).lower() for s, _ in self.items],
+            "level": np.array([s.level for s, _ in self.items], dtype=np.int64),
+            "years": np.array([y for _, y in self.items], dtype=np.int64),
+        })
+        self.orders = {
+            sort: self.frame.sort_values(by, ascending=asc, kind="stable").index.to_numpy()
+            for sort, (by, asc) in _SORT_KEYS.items()
+        } if self.items else {sort: np.empty(0, dtype=np.int64) for sort in _SORT_KEYS}
+        self.masks = {}
+        for row, (skill, _) in enumerate(self.items):
+            for c in skill.categories:
+                mask = self.masks.get(c)
+                if mask is None:
+                    mask = self.masks[c] = np.zeros(len(self.items), dtype=bool)
+                mask[row] = True
+        self.categories = sorted(self.masks)
+        # The skills themselves belong to the data cache
+        self._nbytes = (
+            int(self.frame.memory_usage(index=True, deep=True).sum())
+            + sum(o.nbytes for o in self.orders.values())
+            + sum(m.nbytes for m in self.masks.values())
+            + 64 * len(self.items)
+        )
+
+    def __len__(self):
+        return len(self.items)
+
+    def nbytes(self):
+        return self._nbytes
+
+    @metrics.timed("skills_filter_sort")
+    def query(self, categories=(), sort=SORT_OPTIONS[0]):
+        """(skill, years) pairs having at least one of ``categories`` (all when empty), in ``sort`` order."""
+        order = self.orders.get(sort, self.orders[SORT_OPTIONS[0]])
+        masks = [self.masks[c] for c in categories if c in self.masks]
+        if categories:
+            if not masks:
+                return []
+            order = order[np.logical_or.reduce(masks)[order]]
+        return [self.items[i] for i in order]
+
+
+def skill_index(records, year):
+    """SkillIndex for the models.Skill ``records``, rebuilt only when the snapshot changes.
+
+    The index of the last snapshot is kept per tenant and shared by its sessions.
+    """
+    tenant = tenants.current()
+    last = tenant.get("skills")
+    if last is not None and last.source is records and last.year == year:
+        return last
+    with metrics.phase("skills_normalize"):
+        index = SkillIndex(records, year)
+    tenant.put("skills", index)
+    return index
+
+
+def invalidate():
+    tenants.current().put("skills", None)
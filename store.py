@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# On-disk snapshot of the Airtable tables (SQLite).
+# The page can start from the last good copy instantly, and each sync only
+# downloads the records modified since the previous one.
+
+SYNC_SKEW = 60             # seconds subtracted from the last sync to absorb clock skew
+TOMBSTONE_TTL = 30 * 86400  # seconds deleted records are remembered before purging
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    tbl TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    created_time TEXT,
+    fields TEXT NOT NULL,
+    deleted_at REAL,
+    PRIMARY KEY (tbl, id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tbl TEXT PRIMARY KEY,
+    last_sync TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def modified_since_formula(since):
+    """Airtable formula matching records modified after ``since`` (ISO 8601)."""
+    return f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{since}'))"
+
+
+class SnapshotStore:
+    """SQLite copy of Airtable records with incremental sync and tombstones."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def load(self, tbl):
+        """Return the live records of ``tbl`` in Airtable order, or None if never synced."""
+        with self._lock:
+            if self.last_sync(tbl, locked=True) is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT id, created_time, fields FROM records "
+                "WHERE tbl = ? AND deleted_at IS NULL ORDER BY position",
+                (tbl,),
+            ).fetchall()
+        return [{"id": rid, "createdTime": created, "fields": json.loads(fields)}
+                for rid, created, fields in rows]
+
+    def last_sync(self, tbl, locked=False):
+        query = "SELECT last_sync FROM sync_state WHERE tbl = ?"
+        if locked:
+            row = self._conn.execute(query, (tbl,)).fetchone()
+        else:
+            with self._lock:
+                row = self._conn.execute(query, (tbl,)).fetchone()
+        return row[0] if row else None
+
+    def deleted_since(self, tbl, since):
+        """Ids of records of ``tbl`` tombstoned after ``since`` (epoch seconds)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM records WHERE tbl = ? AND deleted_at > ?", (tbl, since)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def sync(self, tbl, table, options, key_field):
+        """Bring ``tbl`` up to date from the pyairtable ``table`` handle.
+
+        The first sync downloads everything. Later syncs make two requests:
+        an id sweep projected to ``key_field`` (gives order and deletions)
+        and a query for records modified since the last sync. Returns the
+        number of records downloaded with all their fields.
+        """
+        started = _utcnow()
+        since = self.last_sync(tbl)
+        if since is None or tbl in self.get_state("full_sync", []):
+            records = table.all(**options)
+            self._write(tbl, [r["id"] for r in records], records, started, full=True)
+            return len(records)
+
+        order = [r["id"] for r in table.all(**{**options, "fields": [key_field]})]
+        projection = {"fields": options["fields"]} if options.get("fields") else {}
+        changed = table.all(formula=modified_since_formula(since), **projection)
+        with self._lock:
+            known = {r[0] for r in self._conn.execute(
+                "SELECT id FROM records WHERE tbl = ? AND deleted_at IS NULL", (tbl,))}
+        missing = set(order) - known - {r["id"] for r in changed}
+        if missing:
+            # Something slipped past the modified filter: fall back to a full copy
+            records = table.all(**options)
+            self._write(tbl, [r["id"] for r in records], records, started, full=True)
+            return len(records)
+        self._write(tbl, order, changed, started, full=False)
+        return len(changed)
+
+    def _write(self, tbl, order, records, started, full):
+        now = time.time()
+        since = (started - timedelta(seconds=SYNC_SKEW)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        position = {rid: i for i, rid in enumerate(order)}
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO records (tbl, id, position, created_time, fields, deleted_at) "
+                "VALUES (?, ?, ?, ?, ?, NULL) ON CONFLICT (tbl, id) DO UPDATE SET "
+                "position = excluded.position, created_time = excluded.created_time, "
+                "fields = excluded.fields, deleted_at = NULL",
+                [(tbl, r["id"], position.get(r["id"], 0), r.get("createdTime"),
+                  json.dumps(r.get("fields", {}))) for r in records],
+            )
+            if not full:
+                self._conn.executemany(
+                    "UPDATE records SET position = ? WHERE tbl = ? AND id = ?",
+                    [(i, tbl, rid) for rid, i in position.items()],
+                )
+            # Tombstone every record that is no longer in the table
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS sweep (id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM sweep")
+            self._conn.executemany("INSERT INTO sweep (id) VALUES (?)", [(rid,) for rid in order])
+            self._conn.execute(
+                "UPDATE records SET deleted_at = ? WHERE tbl = ? AND deleted_at IS NULL "
+                "AND id NOT IN (SELECT id FROM sweep)",
+                (now, tbl),
+            )
+            self._conn.execute(
+                "DELETE FROM records WHERE tbl = ? AND deleted_at < ?", (tbl, now - TOMBSTONE_TTL)
+            )
+            if full:
+                pending = self._conn.execute("SELECT value FROM state WHERE key = 'full_sync'").fetchone()
+                if pending and tbl in json.loads(pending[0]):
+                    self._conn.execute("UPDATE state SET value = ? WHERE key = 'full_sync'",
+                                       (json.dumps([t for t in json.loads(pending[0]) if t != tbl]),))
+            self._conn.execute(
+                "INSERT INTO sync_state (tbl, last_sync, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (tbl) DO UPDATE SET last_sync = excluded.last_sync, "
+                "synced_at = excluded.synced_at",
+                (tbl, since, now),
+            )
+
+    def patch(self, tbl, records, deleted_ids=(), order=None):
+        """Write single ``records`` and tombstone ``deleted_ids`` without a sync.
+
+        ``order`` (every live id, in Airtable order) rewrites the positions;
+        without it, records not stored yet go last. The last sync time is
+        left alone, so the next incremental sync still covers everything.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            end = self._conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM records WHERE tbl = ?", (tbl,)).fetchone()[0]
+            position = {rid: i for i, rid in enumerate(order or ())}
+            for record in records:
+                if order is None:
+                    row = self._conn.execute(
+                        "SELECT position FROM records WHERE tbl = ? AND id = ?", (tbl, record["id"])).fetchone()
+                    if row is None:
+                        row, end = (end,), end + 1
+                    position[record["id"]] = row[0]
+            self._conn.executemany(
+                "INSERT INTO records (tbl, id, position, created_time, fields, deleted_at) "
+                "VALUES (?, ?, ?, ?, ?, NULL) ON CONFLICT (tbl, id) DO UPDATE SET "
+                "position = excluded.position, created_time = excluded.created_time, "
+                "fields = excluded.fields, deleted_at = NULL",
+                [(tbl, r["id"], position.get(r["id"], 0), r.get("createdTime"),
+                  json.dumps(r.get("fields", {}))) for r in records],
+            )
+            if order is not None:
+                self._conn.executemany(
+                    "UPDATE records SET position = ? WHERE tbl = ? AND id = ?",
+                    [(i, tbl, rid) for rid, i in position.items()],
+                )
+            self._conn.executemany(
+                "UPDATE records SET deleted_at = ? WHERE tbl = ? AND id = ? AND deleted_at IS NULL",
+                [(now, tbl, rid) for rid in deleted_ids],
+            )
+
+    def get_state(self, key, default=None):
+        """A JSON value saved with set_state (webhook ids, cursors...)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO state (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value)),
+            )
+
+    def request_full_sync(self, tbl):
+        """Have the next sync of ``tbl`` download everything (e.g. its fields changed).
+
+        The stored records are kept, and served, until that sync has succeeded.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'full_sync'").fetchone()
+            pending = json.loads(row[0]) if row else []
+            if tbl not in pending:
+                self._conn.execute(
+                    "INSERT INTO state (key, value) VALUES ('full_sync', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                    (json.dumps(pending + [tbl]),),
+                )
+
+    def reset(self, tbl=None):
+        """Forget ``tbl`` (or everything) so the next sync is a full copy."""
+        with self._lock, self._conn:
+            if tbl is None:
+                self._conn.execute("DELETE FROM records")
+                self._conn.execute("DELETE FROM sync_state")
+            else:
+                self._conn.execute("DELETE FROM records WHERE tbl = ?", (tbl,))
+                self._conn.execute("DELETE FROM sync_state WHERE tbl = ?", (tbl,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,74 @@
+import html
+import re
+
+# Tiny HTML template layer for the cards and the header.
+# A template is compiled once, at import, into a single str.format call:
+# whitespace between tags is dropped and every {{ name }} slot becomes a
+# positional field. Values are escaped for HTML text and attributes unless
+# they are Markup (the output of another template), so Airtable text can't
+# inject markup. {{ name|url }} also neutralizes javascript: and other
+# schemes in links.
+
+_SLOT = re.compile(r"\{\{\s*(\w+)\s*(?:\|\s*(\w+)\s*)?\}\}")
+_SCHEME = re.compile(r"([a-z][a-z0-9+.-]*):")
+_SPECIAL = re.compile(r"[&<>\"']")
+_IGNORED = re.compile(r"[\x00-\x20\x7f]+")  # browsers skip these when reading a URL's scheme
+SAFE_SCHEMES = {"http", "https", "mailto"}
+
+
+class Markup(str):
+    """HTML that is safe to insert as is."""
+    __slots__ = ()
+
+
+def escape(value):
+    if type(value) is not str:
+        if isinstance(value, Markup):
+            return value
+        if value is None:
+            return ""
+        value = str(value)
+    if _SPECIAL.search(value) is None:  # most Airtable text: one scan instead of five replaces
+        return value
+    return html.escape(value, quote=True)
+
+
+def safe_url(value):
+    """``value`` when it is a relative or http(s)/mailto link, '#' otherwise."""
+    if value is None:
+        return ""
+    value = str(value).strip()
+    if value.startswith(("https://", "http://", "/")):  # the usual links, no scan needed
+        return value
+    scheme = _SCHEME.match(_IGNORED.sub("", value).lower())
+    if scheme and scheme.group(1) not in SAFE_SCHEMES:
+        return "#"
+    return value
+
+
+FILTERS = {
+    None: escape,
+    "url": lambda value: escape(safe_url(value)),
+}
+
+
+def minify(source):
+    source = re.sub(r">\s+<", "><", source)
+    return re.sub(r"\s+", " ", source).strip()
+
+
+def join(parts):
+    return Markup("".join(parts))
+
+
+class Template:
+    """HTML with {{ name }} slots; render(**values) returns Markup."""
+
+    def __init__(self, source):
+        pieces = _SLOT.split(minify(source))
+        literals = [p.replace("{", "{{").replace("}", "}}") for p in pieces[::3]]
+        self.slots = [(name, FILTERS[flt]) for name, flt in zip(pieces[1::3], pieces[2::3])]
+        self._format = "{}".join(literals).format
+
+    def render(self, **values):
+        return Markup(self._format(*[flt(values[name]) for name, flt in self.slots]))
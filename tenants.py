@@ -0,0 +1,231 @@
+import contextvars
+import functools
+import logging
+import re
+import threading
+import time
+
+import metrics
+
+# Portfolios served by one deployment.
+# Each tenant is one person's portfolio, backed by its own Airtable base and
+# token and picked by ?p=<slug> or by the subdomain. Everything a tenant
+# keeps in memory (tables, card HTML, the skills and search indexes, image
+# state) hangs off its Tenant, so tenants never share or evict each other's
+# entries. A global budget drops the caches of the coldest tenants, which
+# warm again from their on-disk snapshot on their next visit.
+
+DEFAULT = "default"  # the owner's portfolio, served without ?p= or a known subdomain
+MEMORY_BUDGET = 256 * 1024 * 1024  # bytes cached across every tenant
+IDLE_GRACE = 120  # seconds after a visit during which a tenant is never evicted
+
+_SLUG = re.compile(r"[a-z0-9][a-z0-9-]{0,62}")
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("portfolio_tenant", default=None)
+_lock = threading.Lock()
+_tenants = {}  # slug -> Tenant
+_hosts = {}    # host name -> slug
+memory_budget = MEMORY_BUDGET
+evictions = 0
+
+
+class Tenant:
+    """One portfolio: its Airtable base and token, and the caches built for it."""
+
+    def __init__(self, slug, base_id="", api_key="", title="", hosts=()):
+        self.slug = slug
+        self.base_id = base_id
+        self.api_key = api_key
+        self.title = title
+        self.hosts = tuple(hosts)
+        self.last_used = 0.0
+        self.evictions = 0
+        self._locals = {}
+        self._lock = threading.Lock()
+
+    def local(self, name, factory):
+        """The tenant's ``name`` object, created by ``factory()`` on first use."""
+        with self._lock:
+            value = self._locals.get(name)
+            if value is None:
+                value = self._locals[name] = factory()
+            return value
+
+    def get(self, name):
+        return self._locals.get(name)
+
+    def put(self, name, value):
+        with self._lock:
+            if value is None:
+                self._locals.pop(name, None)
+            else:
+                self._locals[name] = value
+
+    def memory(self):
+        """Estimated bytes of the tenant's caches (the objects with an nbytes() method)."""
+        with self._lock:
+            values = list(self._locals.values())
+        return sum(v.nbytes() for v in values if hasattr(v, "nbytes"))
+
+    def evict(self):
+        """Drop the tenant's in-memory caches.
+
+        Objects with an evict() method (the data layer, which also holds the
+        client and the contact outbox) clear themselves and are kept; the
+        rest are forgotten and rebuilt on the next visit.
+        """
+        with self._lock:
+            kept = {k: v for k, v in self._locals.items() if hasattr(v, "evict")}
+            self._locals = kept
+            self.evictions += 1
+        for value in kept.values():
+            value.evict()
+
+
+def register(slug, base_id, api_key, title="", hosts=()):
+    """Add tenant ``slug`` or update its settings (its caches are kept)."""
+    if not _SLUG.fullmatch(slug):
+        raise ValueError(f"invalid tenant slug {slug!r}: use lowercase letters, digits and dashes")
+    with _lock:
+        tenant = _tenants.get(slug)
+        if tenant is None:
+            tenant = _tenants[slug] = Tenant(slug)
+        tenant.base_id = base_id
+        tenant.api_key = api_key
+        tenant.title = title
+        tenant.hosts = tuple(h.lower() for h in hosts)
+        for host in tenant.hosts:
+            _hosts[host] = slug
+    return tenant
+
+
+def configure(config, budget_mb=None):
+    """Register the tenants of ``config``, the [tenants] table of the secrets.
+
+    Each entry is ``[tenants.<slug>]`` with ``base_id``, ``api_key`` and
+    optionally ``title`` (browser tab) and ``hosts`` (host names besides
+    <slug>.<domain>).
+    """
+    global memory_budget
+    if budget_mb:
+        memory_budget = int(float(budget_mb) * 1024 * 1024)
+    for slug, settings in (config or {}).items():
+        register(slug, settings["base_id"], settings["api_key"], settings.get("title", ""),
+                 settings.get("hosts", ()))
+
+
+def resolve(slug=None, host=None):
+    """Tenant named by ``?p=<slug>`` or the Host header; None when it names no tenant."""
+    if slug:
+        return _tenants.get(slug)
+    if host:
+        host = host.split(":")[0].lower()
+        if host in _hosts:
+            return _tenants.get(_hosts[host])
+        # <slug>.portfolio.example.com
+        label = host.split(".")[0]
+        if host.count(".") >= 2 and label in _tenants:
+            return _tenants[label]
+    return default()
+
+
+def default():
+    with _lock:
+        tenant = _tenants.get(DEFAULT)
+        if tenant is None:
+            tenant = _tenants[DEFAULT] = Tenant(DEFAULT)
+        return tenant
+
+
+def current():
+    """Tenant of this session (the default tenant in scripts and outside a run)."""
+    tenant = _current.get()
+    return tenant if tenant is not None else default()
+
+
+def activate(tenant):
+    """Serve ``tenant`` in this context and the workers it starts; returns a reset token."""
+    tenant.last_used = time.monotonic()
+    return _current.set(tenant)
+
+
+def scoped(func):
+    """Decorator for a fragment: run it as the tenant it was defined under.
+
+    A fragment rerun starts in a fresh context, without the tenant the full
+    run activated.
+    """
+    tenant = current()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = activate(tenant)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+def enforce_budget():
+    """Evict the least recently used tenants until the caches fit ``memory_budget``.
+
+    Tenants visited in the last IDLE_GRACE seconds are never evicted: a busy
+    portfolio is bounded by its own caches' limits and cannot push out the
+    other active ones. Returns how many tenants were evicted.
+    """
+    global evictions
+    with _lock:
+        tenants = list(_tenants.values())
+    sizes = {t.slug: t.memory() for t in tenants}
+    total = sum(sizes.values())
+    if total <= memory_budget:
+        return 0
+    now = time.monotonic()
+    evicted = 0
+    for tenant in sorted(tenants, key=lambda t: t.last_used):
+        if total <= memory_budget:
+            break
+        if now - tenant.last_used < IDLE_GRACE or not sizes[tenant.slug]:
+            continue
+        tenant.evict()
+        total -= sizes[tenant.slug] - tenant.memory()
+        evicted += 1
+        logger.info("Evicted the caches of tenant %s (%d bytes)", tenant.slug, sizes[tenant.slug])
+    if total > memory_budget:
+        logger.warning("Active tenants cache %d bytes, over the %d byte budget", total, memory_budget)
+    with _lock:
+        evictions += evicted
+    return evicted
+
+
+def stats():
+    """One row per tenant for the operator panel."""
+    now = time.monotonic()
+    with _lock:
+        tenants = list(_tenants.values())
+    return [
+        {
+            "tenant": t.slug,
+            "base_id": t.base_id,
+            "bytes": t.memory(),
+            "idle_seconds": round(now - t.last_used) if t.last_used else None,
+            "evictions": t.evictions,
+        }
+        for t in tenants
+    ]
+
+
+def _gauges():
+    rows = stats()
+    return {
+        "count": len(rows),
+        "bytes": sum(r["bytes"] for r in rows),
+        "budget_bytes": memory_budget,
+        "evictions": evictions,
+    }
+
+
+metrics.register_gauges("tenants", _gauges)
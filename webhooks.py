@@ -0,0 +1,296 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyairtable.models import WebhookNotification
+
+import data
+import metrics
+import render
+import tenants
+
+# Push invalidation from Airtable webhooks.
+# Each tenant's base gets one webhook on its table data. Airtable pings the
+# receiver (WEBHOOK_PORT, published as WEBHOOK_URL/<tenant>) when records
+# change; the ping is checked against the webhook's MAC secret and wakes the
+# tenant's worker, which reads the change payloads from its cursor and
+# re-fetches only the records they name. While pushes arrive the tables stay
+# fresh for PUSH_TTL instead of data.CACHE_TTL. Reconciliation covers what
+# pushes miss: the payloads are polled every RECONCILE_INTERVAL even without
+# a ping, and the PUSH_TTL refresh is the usual incremental sync.
+
+WEBHOOK_PORT = 8503           # receiver, behind the reverse proxy that serves WEBHOOK_URL
+PUSH_TTL = 6 * 3600           # seconds a table is fresh while its webhook is active
+RECONCILE_INTERVAL = 300      # seconds between payload polls when no ping arrives
+REGISTER_RETRY = 600          # seconds before retrying a webhook Airtable refused to create
+EXPIRY_MARGIN = timedelta(days=2)  # refresh the webhook this long before it expires (after 7 days)
+DEBOUNCE = 0.3                # seconds a ping waits, so a burst of edits is read in one go
+MAX_BODY = 64 * 1024
+
+SPEC = {"options": {"filters": {"dataTypes": ["tableData"]}}}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_subscriptions = {}  # tenant slug -> Subscription
+_server = None
+
+
+class Subscription:
+    """The webhook of one tenant's base and the worker that applies its payloads."""
+
+    def __init__(self, tenant, url):
+        self.tenant = tenant
+        self.url = url
+        self.hook = None     # pyairtable Webhook
+        self.secret = None   # base64 MAC secret, only ever returned when the webhook is created
+        self.cursor = 1      # next payload to read
+        self.active = False
+        self.tables = {}     # table id -> table name (tables the page reads)
+        self.fields = {}     # field id -> field name
+        self.counts = {"pings": 0, "rejected": 0, "payloads": 0, "records": 0, "refreshes": 0, "errors": 0}
+        self.last_change = None
+        self._counts_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with _lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"webhook-{self.tenant.slug}")
+        self._thread.start()
+
+    def _count(self, key, value=1):
+        with self._counts_lock:
+            self.counts[key] += value
+
+    def evict(self):
+        """Kept through tenant evictions: it caches nothing and must keep listening."""
+
+    def notify(self, body, mac):
+        """Check a ping from Airtable; True (and the worker woken) if it is genuine."""
+        try:
+            if self.secret is None:
+                raise ValueError("no webhook yet")
+            ping = WebhookNotification.from_request(body.decode("utf-8"), mac or "", self.secret)
+            if ping.webhook.id != self.hook.id:
+                raise ValueError(f"ping for webhook {ping.webhook.id}")
+        except (ValueError, UnicodeError) as exc:
+            self._count("rejected")
+            logger.warning("Rejected a webhook ping for %s: %s", self.tenant.slug, exc)
+            return False
+        self._count("pings")
+        self._wake.set()
+        return True
+
+    def _run(self):
+        tenants.activate(self.tenant)
+        while True:
+            try:
+                if not self.active:
+                    self._register()
+                self._extend()
+                self._drain()
+            except Exception:
+                self._count("errors")
+                logger.warning("Webhook of %s failed, polling on the usual TTL", self.tenant.slug, exc_info=True)
+                self.active = False
+                data.set_ttl(data.CACHE_TTL)
+            woken = self._wake.wait(RECONCILE_INTERVAL if self.active else REGISTER_RETRY)
+            self._wake.clear()
+            if woken:
+                time.sleep(DEBOUNCE)
+
+    def _register(self):
+        """Reuse the webhook saved for this URL, or create one."""
+        base = data.airtable()
+        saved = data.get_state("webhook") or {}
+        hooks = {h.id: h for h in base.webhooks()}
+        hook = hooks.get(saved.get("id"))
+        if hook is not None and saved.get("url") == self.url and saved.get("secret") and hook.is_hook_enabled:
+            self.cursor = saved.get("cursor", hook.cursor_for_next_payload)
+            if not hook.are_notifications_enabled:
+                # Airtable turns them off after failed deliveries
+                hook.enable_notifications()
+        else:
+            if hook is not None:
+                hook.delete()
+            created = base.add_webhook(self.url, SPEC)
+            hook = next(h for h in base.webhooks() if h.id == created.id)
+            saved = {"id": created.id, "url": self.url, "secret": created.mac_secret_base64}
+            self.cursor = hook.cursor_for_next_payload
+            data.set_state("webhook", {**saved, "cursor": self.cursor})
+            logger.info("Created webhook %s for %s", created.id, self.tenant.slug)
+        self.hook, self.secret = hook, saved["secret"]
+        self._load_schema()
+        self.active = True
+        data.set_ttl(PUSH_TTL)
+
+    def _load_schema(self):
+        # Read again: this is also the projection the tables are fetched with
+        schema = data.schema(force=True)
+        if schema is None:
+            raise RuntimeError("the token can't read the base schema (schema.bases:read)")
+        self.tables = {t.id: t.name for t in schema.tables if t.name in data.TABLES}
+        self.fields = {f.id: f.name for t in schema.tables for f in t.fields}
+
+    def _extend(self):
+        expires = self.hook.expiration_time
+        if expires is not None and expires - datetime.now(timezone.utc) < EXPIRY_MARGIN:
+            self.hook.extend_expiration()
+            self.hook.expiration_time = _parse_time(self.hook.expiration_time)
+
+    def _drain(self):
+        """Apply every payload from the cursor on, then save the cursor."""
+        changes = {}  # table name -> _change()
+        cursor = self.cursor
+        for payload in self.hook.payloads(cursor):
+            cursor = payload.cursor + 1
+            self._count("payloads")
+            if payload.error:
+                # Airtable lost track of the changes: an incremental sync of every table catches up
+                for name in data.TABLES:
+                    changes.setdefault(name, _change())["sync"] = True
+                continue
+            for table_id in payload.destroyed_table_ids:
+                if table_id in self.tables:
+                    changes.setdefault(self.tables[table_id], _change())["full"] = True
+            for table_id, change in payload.changed_tables_by_id.items():
+                if table_id not in self.tables:
+                    continue  # a table the page doesn't read (e.g. contacts)
+                self._collect(changes.setdefault(self.tables[table_id], _change()), self.tables[table_id], change)
+        if cursor == self.cursor:
+            return
+        # Deleted tables and new fields change the schema the ids were mapped with
+        if any(c["full"] for c in changes.values()):
+            self._load_schema()
+        for name, change in changes.items():
+            self._apply(name, change)
+        self.cursor = cursor
+        data.set_state("webhook", {"id": self.hook.id, "url": self.url, "secret": self.secret, "cursor": cursor})
+        if changes:
+            self.last_change = time.time()
+
+    def _collect(self, entry, name, change):
+        if change.changed_fields_by_id or change.created_fields_by_id or change.destroyed_field_ids:
+            entry["full"] = True
+        sort = {key.lstrip("-") for key in data.TABLES[name].get("sort", ())}
+        read = set(data.TABLES[name].get("fields", ())) | sort
+        for rid, record in change.changed_records_by_id.items():
+            names = {self.fields.get(fid) for fid in record.current.cell_values_by_field_id}
+            if None in names or names & read:  # edits to columns the page doesn't read cost nothing
+                entry["changed"].add(rid)
+                entry["reorder"] |= None in names or bool(names & sort)
+        if change.created_records_by_id or change.destroyed_record_ids:
+            entry["changed"] |= set(change.created_records_by_id)
+            entry["deleted"] |= set(change.destroyed_record_ids)
+            entry["reorder"] = True
+
+    def _apply(self, name, change):
+        if change["full"] or change["sync"]:
+            data.refresh(name, full=change["full"])
+            self._count("refreshes")
+            return
+        changed = change["changed"] - change["deleted"]
+        if not changed and not change["deleted"]:
+            return
+        replaced = data.apply_changes(name, changed, change["deleted"], change["reorder"])
+        render.forget(replaced)
+        self._count("records", len(changed) + len(change["deleted"]))
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {
+            "tenant": self.tenant.slug,
+            "webhook": self.hook.id if self.hook else None,
+            "active": self.active,
+            "cursor": self.cursor,
+            **counts,
+        }
+
+
+def _change():
+    return {"changed": set(), "deleted": set(), "reorder": False, "sync": False, "full": False}
+
+
+def _parse_time(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    def _send(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        # /<anything>/<tenant slug>: the last segment picks the subscription
+        slug = self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+        with _lock:
+            subscription = _subscriptions.get(slug)
+        if subscription is None:
+            self._send(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self._send(413)
+            return
+        body = self.rfile.read(length)
+        self._send(200 if subscription.notify(body, self.headers.get("X-Airtable-Content-MAC")) else 401)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_receiver(port=WEBHOOK_PORT, host="127.0.0.1"):
+    """Start the ping receiver once per process."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), _ReceiverHandler)
+        except OSError as exc:
+            logger.warning("Webhook receiver not started on port %s: %s", port, exc)
+            return None
+        _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True, name="webhook-http").start()
+    return _server
+
+
+def subscribe(url, port=None):
+    """Keep the current tenant's tables fresh from an Airtable webhook (no-op without ``url``).
+
+    ``url`` is the public address of the receiver (WEBHOOK_URL); each tenant
+    registers ``<url>/<slug>``. Call after data.configure(); cheap on reruns.
+    """
+    if not url:
+        return None
+    if start_receiver(port or WEBHOOK_PORT) is None:
+        return None
+    tenant = tenants.current()
+    subscription = tenant.local("webhooks", lambda: Subscription(tenant, f"{url.rstrip('/')}/{tenant.slug}"))
+    with _lock:
+        _subscriptions[tenant.slug] = subscription
+    subscription.start()
+    return subscription
+
+
+def stats():
+    with _lock:
+        subscriptions = list(_subscriptions.values())
+    return [s.stats() for s in subscriptions]
+
+
+def _gauges():
+    rows = stats()
+    return {key: sum(r[key] for r in rows) for key in ("pings", "rejected", "payloads", "records", "errors")}
+
+
+metrics.register_gauges("webhooks", _gauges)